@@ -0,0 +1,265 @@
+# /// script
+# dependencies = [
+#   "openpyxl",
+#   "numpy",
+#   "rich",
+# ]
+# ///
+
+"""
+Extraction benchmark on synthetic workbooks (see generate_workbook.py).
+
+For every size the workbook is generated once (kept in BENCH_DIR), then each
+measurement runs in a fresh Python process so sizes don't share caches or
+heap: ``--repeat`` timing runs (the fastest is kept) and one run under
+tracemalloc for per-phase peak memory. Phases are the same ones --profile
+reports: extraction (workbook load, client discovery, client scan, year
+resolution), save_to_json and the fitness_stats analytics. Each run also
+checks that extraction found exactly the generated clients and sessions.
+
+Results go to a JSON report with a stable layout; ``--compare OLD.json``
+prints the change against an earlier report.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+try:
+    import resource  # Unix only: peak RSS of each run
+except ImportError:
+    resource = None
+
+# =============================================================================
+# CONFIGURATION CONSTANTS - Modify these to control the benchmark
+# =============================================================================
+
+SIZES = [100, 1000, 5000, 20000]
+BENCH_DIR = ".bench"                   # Generated workbooks and run outputs
+REPORT_FILE = "benchmark_report.json"
+REPORT_VERSION = 1
+DEFAULT_REPEAT = 1
+
+# Phases compared by --compare and shown in the summary table
+SUMMARY_PHASES = ["extract", "save_to_json", "fitness_stats"]
+
+# =============================================================================
+# END CONFIGURATION
+# =============================================================================
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)  # bytes on macOS, KiB elsewhere
+
+
+def run_once(workbook, output_dir, backend, trace_memory):
+    """One measured run in this process: extraction, save_to_json and the fitness_stats analytics."""
+    import extract_sessions
+    import fitness_stats
+    import profiling
+
+    output_file = os.path.join(output_dir, "fitness_sessions_api.json")
+    profiler = profiling.PROFILER
+    profiler.start(trace_memory=trace_memory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with profiling.phase("extract"):
+            data = extract_sessions.extract_client_sessions(workbook, max_clients=sys.maxsize, backend=backend)
+        with profiling.phase("save_to_json"):
+            extract_sessions.save_to_json(data, output_file)
+        with profiling.phase("fitness_stats"):
+            with profiling.phase("load_fitness_data"):
+                stats_data = fitness_stats.load_fitness_data(output_file)
+            with profiling.phase("analytics"):
+                fitness_stats.get_overview_stats(stats_data)
+                fitness_stats.get_date_analytics(stats_data)
+                fitness_stats.get_client_rankings(stats_data)
+                fitness_stats.get_session_patterns(stats_data)
+    profiler.stop()
+
+    clients = list(data["clients"].values())
+    return {
+        "phases": {
+            name: {
+                "calls": stats["calls"],
+                "seconds": round(stats["seconds"], 4),
+                "peak_mb": round(stats["peak"] / 1e6, 1) if stats["peak"] is not None else None,
+            }
+            for name, stats in profiler.phases.items()
+        },
+        "seconds": round(profiler.seconds, 4),
+        "max_rss_mb": _peak_rss_mb(),
+        "extracted": {
+            "clients": len(clients),
+            "paid": sum(client.paid_used for client in clients),
+            "unpaid": sum(client.unpaid_count for client in clients),
+            "remaining": sum(client.remaining for client in clients),
+            "previous": sum(client.previous_completed for client in clients),
+            "extra": sum(len(client.extra or []) for client in clients),
+        },
+        "output_bytes": os.path.getsize(output_file),
+    }
+
+
+def run_in_subprocess(workbook, output_dir, backend, trace_memory):
+    command = [sys.executable, os.path.abspath(__file__), "--run-once", os.path.abspath(workbook),
+               "--output-dir", os.path.abspath(output_dir), "--backend", backend]
+    if trace_memory:
+        command.append("--trace-memory")
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"benchmark run failed for {workbook}:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def ensure_workbook(clients, seed, bench_dir=BENCH_DIR):
+    """Path and expected totals of the synthetic workbook for ``clients`` (generated on first use)."""
+    import generate_workbook
+
+    os.makedirs(bench_dir, exist_ok=True)
+    workbook = os.path.join(bench_dir, f"synthetic_{clients}_seed{seed}.xlsx")
+    expected_file = workbook[:-len(".xlsx")] + ".expected.json"
+    if os.path.exists(workbook) and os.path.exists(expected_file):
+        with open(expected_file, "r", encoding="utf-8") as f:
+            return workbook, json.load(f)
+    print(f"  generating {workbook} ...", flush=True)
+    expected = generate_workbook.generate_workbook(workbook, clients, seed)
+    with open(expected_file, "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2)
+    return workbook, expected
+
+
+def benchmark_size(clients, seed, backend, repeat, trace_memory=True):
+    workbook, expected = ensure_workbook(clients, seed)
+    output_dir = os.path.join(BENCH_DIR, f"run_{clients}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    timings = [run_in_subprocess(workbook, output_dir, backend, trace_memory=False) for _ in range(repeat)]
+    best = min(timings, key=lambda run: run["seconds"])
+    memory = run_in_subprocess(workbook, output_dir, backend, trace_memory=True) if trace_memory else None
+
+    phases = {}
+    for name, stats in best["phases"].items():
+        phases[name] = {
+            "calls": stats["calls"],
+            "seconds": stats["seconds"],
+            "seconds_all": [run["phases"][name]["seconds"] for run in timings],
+            "peak_mb": memory["phases"].get(name, {}).get("peak_mb") if memory else None,
+        }
+    extracted = best["extracted"]
+    return {
+        "clients": clients,
+        "workbook_bytes": os.path.getsize(workbook),
+        "rows": expected["rows"],
+        "sessions": expected["paid"] + expected["unpaid"],
+        "seconds": best["seconds"],
+        "max_rss_mb": best["max_rss_mb"],
+        "output_bytes": best["output_bytes"],
+        "phases": phases,
+        "extracted": extracted,
+        "verified": all(extracted[key] == expected[key] for key in extracted),
+    }
+
+
+def summary_table(results):
+    header = f"{'Clients':>8}{'Sessions':>10}" + "".join(f"{name + ' (s)':>20}" for name in SUMMARY_PHASES) + f"{'Peak MB':>10}{'RSS MB':>9}  OK"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        peaks = [result["phases"].get(name, {}).get("peak_mb") for name in SUMMARY_PHASES]
+        peak = max((value for value in peaks if value is not None), default=None)
+        lines.append(f"{result['clients']:>8}{result['sessions']:>10}"
+                     + "".join(f"{result['phases'].get(name, {}).get('seconds', 0):>20.3f}" for name in SUMMARY_PHASES)
+                     + f"{peak if peak is not None else '-':>10}{result['max_rss_mb'] or '-':>9}  {'✓' if result['verified'] else '✗'}")
+    return "\n".join(lines)
+
+
+def compare_reports(old, new):
+    """Text table of the per-phase time ratio new/old for every size present in both reports."""
+    old_results = {result["clients"]: result for result in old["results"]}
+    header = f"{'Clients':>8}" + "".join(f"{name:>22}" for name in SUMMARY_PHASES)
+    lines = [f"\nChange vs {old.get('generatedAt', 'previous report')} (new / old time)", header, "-" * len(header)]
+    for result in new["results"]:
+        previous = old_results.get(result["clients"])
+        if previous is None:
+            continue
+        cells = []
+        for name in SUMMARY_PHASES:
+            before = previous["phases"].get(name, {}).get("seconds")
+            after = result["phases"].get(name, {}).get("seconds")
+            cells.append(f"{after / before:>21.2f}x" if before and after is not None else f"{'-':>22}")
+        lines.append(f"{result['clients']:>8}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def _versions():
+    versions = {"python": platform.python_version()}
+    for module in ("openpyxl", "numpy", "orjson"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return versions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extraction, save_to_json and fitness_stats on synthetic workbooks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, metavar="N",
+                        help=f"client counts to benchmark (default: {' '.join(map(str, SIZES))})")
+    parser.add_argument("--seed", type=int, default=42, help="generator seed (default: 42)")
+    parser.add_argument("--backend", choices=["openpyxl", "ooxml"], default="openpyxl",
+                        help="workbook parser used by extraction (default: openpyxl)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, metavar="N",
+                        help="timing runs per size; the fastest is reported (default: 1)")
+    parser.add_argument("--no-memory", dest="trace_memory", action="store_false",
+                        help="skip the tracemalloc run (no per-phase peak memory)")
+    parser.add_argument("-o", "--output", default=REPORT_FILE, metavar="PATH",
+                        help=f"JSON report to write (default: {REPORT_FILE})")
+    parser.add_argument("--compare", metavar="PATH", help="earlier report to compare the results with")
+    # Internal: a single measured run, executed in a fresh process by benchmark_size
+    parser.add_argument("--run-once", metavar="WORKBOOK", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_once:
+        print(json.dumps(run_once(args.run_once, args.output_dir, args.backend, args.trace_memory)))
+        return
+
+    results = []
+    for clients in args.sizes:
+        print(f"Benchmarking {clients} clients ({args.backend})...", flush=True)
+        results.append(benchmark_size(clients, args.seed, args.backend, args.repeat, args.trace_memory))
+    report = {
+        "version": REPORT_VERSION,
+        "generatedAt": datetime.now().isoformat(),
+        "machine": {"platform": platform.platform(), "processor": platform.machine(), "cpus": os.cpu_count()},
+        "versions": _versions(),
+        "settings": {"seed": args.seed, "backend": args.backend, "repeat": args.repeat, "traceMemory": args.trace_memory},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    print(summary_table(results))
+    print(f"\nReport written to {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare_reports(json.load(f), report))
+    if not all(result["verified"] for result in results):
+        sys.exit("✗ Extraction did not reproduce the generated sessions for every size")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,43 @@
 # /// script
 # dependencies = [
 #   "openpyxl",
+#   "numpy",
+#   "rich",
 # ]
 # ///
 
+import numpy as np
 import openpyxl
+import ooxml_reader
+import profiling
+from session_model import ClientRecord, load_api_records, save_sessions_store, session_date_strings, sessions_store_path
+import argparse
+import calendar
+import contextlib
+import fnmatch
+import glob
+import hashlib
+import io
+import itertools
 import json
+import logging
+import marshal
+import os
+import sqlite3
+import sys
+import zlib
 import copy
-from datetime import datetime, date
+from array import array
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, date, time, timedelta
+from openpyxl.styles.colors import COLOR_INDEX
+
+try:
+    import orjson  # Optional: faster JSON encoding in save_to_json
+except ImportError:
+    orjson = None
+from time import perf_counter, sleep
 
 # =============================================================================
 # CONFIGURATION CONSTANTS - Modify these to control script behavior
@@ -17,6 +47,8 @@ from datetime import datetime, date
 EXCEL_FILE_PATH = "excel.xlsx"
 OUTPUT_FILE_LEGACY = "all_clients_sessions_final.json"  
 OUTPUT_FILE_API = "fitness_sessions_api.json"
+OUTPUT_FILE_SQLITE = "fitness_sessions.db"  # Written with --sqlite
+OUTPUT_FILE_CHANGEFEED = "fitness_sessions_changes.jsonl"  # Appended to with --changefeed
 
 # Processing limits
 MAX_CLIENTS = 200  # Maximum number of clients to process
@@ -43,6 +75,32 @@ COLOR_UNPAID_ORANGE = "FFFF9900"  # Orange cells = unpaid sessions
 COLOR_DEFAULT_BLACK = "00000000"  # Default/empty color to skip
 COLOR_DEFAULT_WHITE = "FFFFFFFF"  # Default/empty color to skip
 
+# Fill palette: fills listed here are classified directly; any other ARGB fill
+# falls back to the orange-ish heuristics ("FF99" / "FFFF" prefix = unpaid).
+# Theme and indexed colors are written "theme:N" (or "theme:N:tint", e.g.
+# "theme:9:0.4") and "indexed:N"; unlisted indexed colors are resolved through
+# the legacy Excel palette, unlisted theme colors are ignored.
+SESSION_FILL_PALETTE = {
+    "paid": [COLOR_PAID_GREEN],
+    "unpaid": [COLOR_UNPAID_ORANGE],
+    "ignore": [COLOR_DEFAULT_BLACK, COLOR_DEFAULT_WHITE],
+}
+
+# Caching (stored in a directory next to the workbook)
+CACHE_DIR = ".extract_cache"
+SECTION_CACHE_VERSION = 1  # Bump when scan_client_section output changes
+GRID_CACHE_VERSION = 2     # Bump when snapshot_worksheet / the grid cache format changes
+
+# Watch mode (--watch): how often the workbook is checked, and how long it must
+# stay unchanged before re-extracting (Excel writes a save in several steps)
+WATCH_POLL_SECONDS = 0.5
+WATCH_DEBOUNCE_SECONDS = 2.0
+OUTPUT_FILE_STATS = "fitness_stats_summary.json"
+
+# Console logging: WARNING is quiet (final summary only), INFO adds one block
+# per client, DEBUG adds every candidate and session cell (-v / -vv)
+LOG_LEVEL = logging.WARNING
+
 # =============================================================================
 # END CONFIGURATION
 # =============================================================================
@@ -50,6 +108,107 @@ COLOR_DEFAULT_WHITE = "FFFFFFFF"  # Default/empty color to skip
 # NEW: global counter for processed clients
 processed_count = 0  # Will be updated by extract_client_sessions
 
+logger = logging.getLogger("extract_sessions")
+
+class _ConsoleHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is right now, so redirect_stdout also captures log records."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+def configure_logging(level=LOG_LEVEL):
+    """Send extract_sessions log records to stdout as plain messages at ``level`` (also a pool initializer)."""
+    logger.setLevel(level)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = _ConsoleHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+
+configure_logging()
+
+METRIC_COUNTERS = {
+    "clients": "Client sections extracted",
+    "sections_reused": "Client sections reused from the section cache",
+    "cells_scanned": "Session-column cells whose fill color was checked",
+    "colored_cells": "Cells classified as paid or unpaid sessions",
+    "date_lookups_below": "Date lookups in the row below a session cell",
+    "date_lookups_above": "Date lookups in the row above a session cell",
+    "date_parse_failures": "Session cells whose neighbouring value could not be read as a date",
+}
+
+class ExtractionMetrics:
+    """
+    Work counters (see METRIC_COUNTERS) and per-client scan timings for one run.
+
+    Worker processes fill their own instance and the parent merge()s them, so
+    the totals are the same for serial, parallel and batch runs.
+    """
+
+    def __init__(self):
+        self.counters = Counter({name: 0 for name in METRIC_COUNTERS})
+        self.client_timings = []  # {"name", "row", "seconds", "cached"} in sheet order
+        self.started = perf_counter()
+        self.seconds = 0.0
+
+    def add_client(self, client_name, client_row, seconds, cached=False):
+        self.counters["clients"] += 1
+        if cached:
+            self.counters["sections_reused"] += 1
+        self.client_timings.append({"name": client_name, "row": client_row, "seconds": round(seconds, 6), "cached": cached})
+
+    def merge(self, other):
+        self.counters.update(other.counters)
+        self.client_timings.extend(other.client_timings)
+
+    def finish(self):
+        self.seconds = perf_counter() - self.started
+
+    def as_dict(self):
+        scan_seconds = sum(timing["seconds"] for timing in self.client_timings)
+        slowest = sorted(self.client_timings, key=lambda timing: timing["seconds"], reverse=True)[:10]
+        return {
+            "generatedAt": datetime.now().isoformat() + "Z",
+            "counters": dict(self.counters),
+            "seconds": {"total": round(self.seconds, 6), "client_scans": round(scan_seconds, 6)},
+            "slowestClients": slowest,
+            "clients": self.client_timings,
+        }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (counters, run duration and per-client scan seconds)."""
+        def label(text):
+            return str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = []
+        for name, help_text in METRIC_COUNTERS.items():
+            lines += [f"# HELP extract_{name}_total {help_text}.",
+                      f"# TYPE extract_{name}_total counter",
+                      f"extract_{name}_total {self.counters[name]}"]
+        lines += ["# HELP extract_duration_seconds Wall time of the extraction run.",
+                  "# TYPE extract_duration_seconds gauge",
+                  f"extract_duration_seconds {self.seconds:.6f}",
+                  "# HELP extract_client_scan_seconds Time spent scanning one client section.",
+                  "# TYPE extract_client_scan_seconds gauge"]
+        for timing in self.client_timings:
+            lines.append(f'extract_client_scan_seconds{{client="{label(timing["name"])}",row="{timing["row"]}",'
+                         f'cached="{str(timing["cached"]).lower()}"}} {timing["seconds"]:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def save(self, path, fmt="json"):
+        """Write the metrics as JSON or Prometheus text (``fmt`` = "json" / "prometheus")."""
+        self.finish()
+        with open(path, 'w', encoding='utf-8') as f:
+            if fmt == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.as_dict(), f, indent=2, ensure_ascii=False)
+
 # Reference date is now dynamic (today)
 CURRENT_DATE_REF = date.today()
 
@@ -150,26 +309,441 @@ def enhance_session_dates(sessions_list):
             result.append(item)
     return result
 
-def find_previous_completed_sessions(ws, client_row, client_name):
+# date(1970, 1, 1).toordinal(): converts numpy day numbers to Python date ordinals
+_UNIX_EPOCH_ORDINAL = 719163
+
+_DAY_MONTH = {}  # "d.m" -> (day, month), or None for entries the batch path leaves to enhance_session_dates
+
+def _parse_day_month(date_str):
+    parts = date_str.split('.')
+    if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    day, month = int(parts[0]), int(parts[1])
+    # Month lengths of a common year: 29.2 depends on leap years, and impossible
+    # days (31.9, 30.2) would roll into the next month in _ordinals
+    if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(2001, month)[1]:
+        return None
+    return day, month
+
+def _day_month_arrays(sequence):
+    """(days, months) lists for a "d.m" sequence, or None if an entry can't take part in the batch path."""
+    days = []
+    months = []
+    for date_str in sequence:
+        try:
+            parsed = _DAY_MONTH[date_str]
+        except KeyError:
+            parsed = _DAY_MONTH[date_str] = _parse_day_month(date_str)
+        if parsed is None:
+            return None
+        days.append(parsed[0])
+        months.append(parsed[1])
+    return days, months
+
+def _ordinals(years, months, days):
+    """Python date ordinals for parallel year / month / day arrays."""
+    month_starts = ((years - 1970) * 12 + (months - 1)).astype("datetime64[M]").astype("datetime64[D]")
+    return (month_starts + (days - 1)).astype(np.int64) + _UNIX_EPOCH_ORDINAL
+
+def resolve_session_years(sequences, reference_date=None):
+    """
+    Batch version of enhance_session_dates: resolve the year of every "d.m"
+    date of every sequence at once and return lists of date ordinals.
+
+    All sequences are concatenated into integer arrays. A year rolls over
+    wherever (month, day) goes backwards within a sequence, starting from
+    last year; sequences that never roll over and end within
+    RECENT_THRESHOLD_DAYS of ``reference_date`` move forward one year. Entries
+    enhance_session_dates leaves unresolved come back as 0. Format with
+    format_session_date() only when writing output.
+    """
+    if reference_date is None:
+        reference_date = CURRENT_DATE_REF
+    results = [None] * len(sequences)
+    batch = []  # (position, days, months)
+    for position, sequence in enumerate(sequences):
+        if not sequence:
+            results[position] = []
+            continue
+        parsed = _day_month_arrays(sequence)
+        if parsed is None:
+            # Rare inputs (29.2, impossible days, malformed entries) keep the exact per-session rules
+            results[position] = [_parse_enhanced_date(item) for item in enhance_session_dates(sequence)]
+        else:
+            batch.append((position, *parsed))
+    if not batch:
+        return results
+
+    lengths = np.array([len(days) for _, days, _ in batch], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ends = starts + lengths - 1
+    days = np.fromiter((day for _, seq_days, _ in batch for day in seq_days), dtype=np.int64, count=int(lengths.sum()))
+    months = np.fromiter((month for _, _, seq_months in batch for month in seq_months), dtype=np.int64, count=len(days))
+
+    # Year roll-over: (month, day) earlier than the previous session's
+    key = months * 32 + days
+    rolls = np.zeros(len(key), dtype=np.int64)
+    rolls[1:] = key[1:] < key[:-1]
+    rolls[starts] = 0
+    rolled = np.cumsum(rolls)
+    rolled -= np.repeat(rolled[starts], lengths)
+    years = reference_date.year - 1 + rolled
+
+    # Recent-shift: a sequence still in its first year that ends recently is this year's
+    ordinals = _ordinals(years, months, days)
+    shift = (rolled[ends] == 0) & (reference_date.toordinal() - ordinals[ends] <= RECENT_THRESHOLD_DAYS)
+    if shift.any():
+        shifted = np.repeat(shift, lengths)
+        ordinals[shifted] = _ordinals(years[shifted] + 1, months[shifted], days[shifted])
+
+    flat = ordinals.tolist()
+    for (position, _, _), start, length in zip(batch, starts.tolist(), lengths.tolist()):
+        results[position] = flat[start:start + length]
+    return results
+
+def _parse_enhanced_date(text):
+    """Ordinal of an enhance_session_dates "DD.MM.YYYY" string (0 if it stayed unresolved)."""
+    parts = text.split('.')
+    if len(parts) != 3:
+        return 0
+    return date(int(parts[2]), int(parts[1]), int(parts[0])).toordinal()
+
+def format_session_date(ordinal):
+    """"DD.MM.YYYY" for a session date ordinal ("" if the date could not be resolved)."""
+    return session_date_strings(ordinal)[1] if ordinal else ""
+
+def resolve_client_dates(clients):
+    """Fill the paid / unpaid date ordinals of every ClientRecord still holding raw "d.m" dates, in one batch."""
+    with profiling.phase("resolve session years"):
+        pending = [record for record in clients.values() if record.pending_dates is not None]
+        resolved = resolve_session_years([dates for record in pending for dates in record.pending_dates])
+        for record, paid, unpaid in zip(pending, resolved[0::2], resolved[1::2]):
+            record.paid = array("i", paid)
+            record.unpaid = array("i", unpaid)
+            record.pending_dates = None
+
+# Columns captured in the grid snapshot: A-M (everything the extractor reads)
+GRID_COLUMNS = SESSION_COLUMNS_END - 1
+
+class SheetGrid:
+    """
+    Compact in-memory snapshot of the worksheet cells the extractor reads.
+
+    Values and resolved fill colors live in two parallel flat lists indexed by
+    ``(row - base_row) * stride + col``, so every lookup during discovery,
+    counting and date resolution is a list index instead of an openpyxl cell
+    access. One padding row is kept above and below the used range so the
+    "date above / date below" lookups never fall off the grid.
+    """
+
+    __slots__ = ("values", "colors", "base_row", "max_row", "stride")
+
+    def __init__(self, values, colors, base_row, max_row, stride=GRID_COLUMNS + 1):
+        self.values = values
+        self.colors = colors
+        self.base_row = base_row
+        self.max_row = max_row
+        self.stride = stride
+
+    def value(self, row, col):
+        return self.values[(row - self.base_row) * self.stride + col]
+
+    def color(self, row, col):
+        return self.colors[(row - self.base_row) * self.stride + col]
+
+    def section(self, first_row, last_row):
+        """Copy rows first_row..last_row into a standalone SheetGrid (e.g. to ship one client section to a worker)."""
+        start = (first_row - self.base_row) * self.stride
+        stop = (last_row + 1 - self.base_row) * self.stride
+        return SheetGrid(self.values[start:stop], self.colors[start:stop], first_row, last_row, self.stride)
+
+def _color_key(color):
+    """Palette key of an openpyxl Color: "AARRGGBB", "theme:N[:tint]" or "indexed:N" (see FillClassifier)."""
+    if color.type == "theme":
+        return f"theme:{color.theme}:{color.tint:g}" if color.tint else f"theme:{color.theme}"
+    if color.type == "indexed":
+        return f"indexed:{color.indexed}"
+    if color.type == "rgb" and color.rgb:
+        return str(color.rgb)
+    return None
+
+def _cell_rgb(cell):
+    """Resolve a cell's fill foreground color to its palette key (None for fills without one)."""
+    color = getattr(cell.fill, "fgColor", None)
+    return _color_key(color) if color else None
+
+def snapshot_worksheet(ws):
+    """Walk the worksheet once and return a SheetGrid of values and fill colors (columns A-M)."""
+    max_row = ws.max_row
+    stride = GRID_COLUMNS + 1
+    # Rows 0 .. max_row + 1 (padding on both sides)
+    size = (max_row + 2) * stride
+    values = [None] * size
+    colors = [None] * size
+    rgb_by_fill_id = {}  # A workbook only has a handful of distinct fills
+
+    # Only cells that exist in the sheet; iter_rows() would materialise every
+    # empty coordinate in the used range, which is where most of the time went.
+    for (row, col), cell in ws._cells.items():
+        if col > GRID_COLUMNS:
+            continue
+        idx = row * stride + col
+        values[idx] = cell.value
+        fill_id = cell._style.fillId
+        if fill_id not in rgb_by_fill_id:
+            rgb_by_fill_id[fill_id] = _cell_rgb(cell)
+        colors[idx] = rgb_by_fill_id[fill_id]
+
+    return SheetGrid(values, colors, 0, max_row, stride)
+
+GRID_CACHE_MAGIC = b"FLOGRID\0"
+
+def snapshot_ooxml(excel_file_path, sheet_name=None):
+    """
+    Build a SheetGrid straight from the workbook's XML (see ooxml_reader), bypassing openpyxl.
+
+    Produces the same grid as snapshot_worksheet: non-anchor cells of merged
+    ranges are emptied and ``max_row`` counts merged ranges too.
+    """
+    stride = GRID_COLUMNS + 1
+    values = []
+    colors = []
+    with ooxml_reader.WorkbookReader(excel_file_path) as workbook:
+        sheet = workbook.sheet(sheet_name)
+        for row, col, value, rgb in sheet.cells(max_col=GRID_COLUMNS):
+            idx = row * stride + col
+            if idx >= len(values):
+                grow = (row + 1) * stride - len(values)
+                values.extend([None] * grow)
+                colors.extend([None] * grow)
+            values[idx] = value
+            colors[idx] = rgb
+        max_row = sheet.max_row
+        empty_rgb = workbook.style_fill_rgb[0]
+
+        # Rows 0 .. max_row + 1 (padding on both sides)
+        grow = (max_row + 2) * stride - len(values)
+        values.extend([None] * grow)
+        colors.extend([None] * grow)
+
+        for min_row, min_col, last_row, last_col in sheet.merged_ranges:
+            for row in range(min_row, last_row + 1):
+                for col in range(min_col, min(last_col, GRID_COLUMNS) + 1):
+                    if (row, col) != (min_row, min_col):
+                        values[row * stride + col] = None
+                        colors[row * stride + col] = empty_rgb
+
+    return SheetGrid(values, colors, 0, max_row, stride)
+
+GRID_BACKENDS = {
+    "openpyxl": None,  # handled in load_sheet_grid (needs the workbook object)
+    "ooxml": snapshot_ooxml,
+}
+
+def _grid_cache_key(excel_file_path, sheet_name, backend="openpyxl"):
+    """Hash of the workbook contents, the requested sheet, the backend and the parser version."""
+    digest = hashlib.sha256()
+    with open(excel_file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(f"|{sheet_name}|{backend}|{GRID_CACHE_VERSION}|{openpyxl.__version__}".encode("utf-8"))
+    return digest.digest()
+
+def _grid_cache_path(excel_file_path, sheet_name):
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), CACHE_DIR)
+    return os.path.join(cache_dir, f"{os.path.basename(excel_file_path)}.{_slugify(sheet_name or 'active')}.grid")
+
+def _encode_cell_value(value):
+    # marshal only knows builtin types; dates and times become tagged tuples
+    # (openpyxl never returns tuples as cell values, so the tag is unambiguous)
+    if isinstance(value, timedelta):
+        return ("timedelta", value.days, value.seconds, value.microseconds)
+    if isinstance(value, (datetime, date, time)):
+        return (type(value).__name__, value.isoformat())
+    return value
+
+def _decode_cell_value(value):
+    if type(value) is tuple:
+        kind = value[0]
+        if kind == "datetime":
+            return datetime.fromisoformat(value[1])
+        if kind == "date":
+            return date.fromisoformat(value[1])
+        if kind == "time":
+            return time.fromisoformat(value[1])
+        return timedelta(days=value[1], seconds=value[2], microseconds=value[3])
+    return value
+
+def save_grid_cache(grid, path, key):
+    """
+    Store a SheetGrid in a compact binary file.
+
+    Layout: magic, the 32-byte cache key, then a zlib-compressed marshal
+    payload holding the grid shape, the distinct fill colors (palette), one
+    palette index per cell, and the non-empty values with their positions.
+    """
+    palette = [None]
+    palette_index = {None: 0}
+    color_codes = array("B" if len(set(grid.colors)) <= 256 else "H")
+    for rgb in grid.colors:
+        code = palette_index.get(rgb)
+        if code is None:
+            code = palette_index[rgb] = len(palette)
+            palette.append(rgb)
+        color_codes.append(code)
+    positions = array("I", (i for i, value in enumerate(grid.values) if value is not None))
+    values = [_encode_cell_value(grid.values[i]) for i in positions]
+
+    payload = (grid.base_row, grid.max_row, grid.stride, len(grid.values), palette,
+               color_codes.typecode, color_codes.tobytes(), positions.tobytes(), values)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(GRID_CACHE_MAGIC + key + zlib.compress(marshal.dumps(payload), 1))
+    os.replace(tmp_path, path)
+
+def load_grid_cache(path, key):
+    """Load a SheetGrid stored by save_grid_cache, or None if the file is missing or stale."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(len(GRID_CACHE_MAGIC) + len(key))
+            if header != GRID_CACHE_MAGIC + key:
+                return None
+            payload = marshal.loads(zlib.decompress(f.read()))
+    except (OSError, ValueError, EOFError, TypeError, zlib.error):
+        return None
+
+    base_row, max_row, stride, size, palette, typecode, color_bytes, position_bytes, encoded_values = payload
+    color_codes = array(typecode)
+    color_codes.frombytes(color_bytes)
+    positions = array("I")
+    positions.frombytes(position_bytes)
+
+    values = [None] * size
+    for position, value in zip(positions, encoded_values):
+        values[position] = _decode_cell_value(value)
+    colors = [palette[code] for code in color_codes]
+    return SheetGrid(values, colors, base_row, max_row, stride)
+
+def load_sheet_grid(excel_file_path=EXCEL_FILE_PATH, sheet_name=None, use_cache=False, backend="openpyxl"):
+    """
+    Load the workbook and snapshot one sheet (the active one by default) into a SheetGrid.
+
+    ``backend`` selects the parser: "openpyxl" (default) or "ooxml", the raw
+    XML fast path in ooxml_reader.
+
+    With ``use_cache`` the snapshot is stored in CACHE_DIR next to the
+    workbook, keyed by the workbook's content hash and the parser version;
+    while the workbook is unchanged later calls load that file and never
+    touch openpyxl.
+    """
+    if use_cache:
+        key = _grid_cache_key(excel_file_path, sheet_name, backend)
+        cache_path = _grid_cache_path(excel_file_path, sheet_name)
+        grid = load_grid_cache(cache_path, key)
+        if grid is not None:
+            logger.info("Loaded parsed sheet from cache: %s", cache_path)
+            return grid
+
+    if backend == "openpyxl":
+        wb = openpyxl.load_workbook(excel_file_path, data_only=True)
+        try:
+            grid = snapshot_worksheet(wb[sheet_name] if sheet_name else wb.active)
+        finally:
+            wb.close()
+    else:
+        grid = GRID_BACKENDS[backend](excel_file_path, sheet_name)
+
+    if use_cache:
+        save_grid_cache(grid, cache_path, key)
+    return grid
+
+class _MemoTable(dict):
+    """Dict that computes and stores a missing key's value on first lookup."""
+
+    def __init__(self, compute):
+        super().__init__()
+        self.compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        return value
+
+class FillClassifier:
+    """
+    Classifies fill color keys (see _cell_rgb) once and memoizes the answers.
+
+    A workbook uses only a handful of distinct fills, so after the first few
+    cells every lookup in ``kinds`` ("paid" / "unpaid" / None) and
+    ``section_marks`` (does the fill mark a client section) is a dict hit.
+    """
+
+    def __init__(self, palette=SESSION_FILL_PALETTE):
+        self.palette = {key: kind for kind, keys in palette.items() for key in keys}
+        self.kinds = _MemoTable(self._kind)
+        self.section_marks = _MemoTable(self._marks_section)
+
+    def _lookup(self, key):
+        """
+        (palette entry, ARGB) for a key. "theme:N:tint" falls back to the
+        "theme:N" entry; indexed colors resolve through the legacy palette.
+        Unlisted theme colors and unknown indexes have no ARGB.
+        """
+        listed = self.palette.get(key)
+        if key.startswith("theme:"):
+            if listed is None and key.count(":") == 2:
+                listed = self.palette.get(key.rpartition(":")[0])
+            return listed, None
+        rgb = key
+        if key.startswith("indexed:"):
+            index = int(key.partition(":")[2])
+            rgb = "FF" + COLOR_INDEX[index][2:] if index < len(COLOR_INDEX) else None
+            if listed is None and rgb:
+                listed = self.palette.get(rgb)
+        return listed, rgb
+
+    def _kind(self, key):
+        if not key:
+            return None
+        listed, rgb = self._lookup(key)
+        if listed is not None:
+            return listed if listed != "ignore" else None
+        if rgb and ("FF99" in rgb or "FFFF" in rgb[:4]):
+            return "unpaid"
+        return None
+
+    def _marks_section(self, key):
+        if not key:
+            return False
+        listed, rgb = self._lookup(key)
+        if listed is not None:
+            return listed != "ignore"
+        return bool(rgb) and "FF99" in rgb
+
+FILL_CLASSIFIER = FillClassifier()
+
+def find_previous_completed_sessions(grid, client_row, client_name):
     """Find optional previous completed sessions number in Column C, 3-7 rows below client name."""
-    print(f"🔍 Searching for previous sessions in {client_name} section - Column C only, rows {client_row+3} to {client_row+7}")
+    logger.debug("🔍 Searching for previous sessions in %s section - Column C only, rows %d to %d", client_name, client_row + 3, client_row + 7)
     
     # Search only in Column C, 3-7 rows below client name
     candidates = []
     
     for check_row in range(client_row + PREVIOUS_SESSIONS_SEARCH_START, client_row + PREVIOUS_SESSIONS_SEARCH_END):
         col = 3  # Only Column C
-        cell = ws.cell(row=check_row, column=col)
-        if cell.value is not None:
+        if check_row > grid.max_row:
+            break
+        value = grid.value(check_row, col)
+        if value is not None:
             try:
                 # Check if it's a standalone number (not a date)
-                value_str = str(cell.value).strip()
+                value_str = str(value).strip()
                 # More flexible number detection
                 if value_str.replace('.', '').replace(',', '').isdigit():
                     num_val = int(float(value_str.replace(',', '.')))
                     if MIN_PREVIOUS_SESSIONS <= num_val <= MAX_PREVIOUS_SESSIONS:  # Broader reasonable range
                         candidates.append((num_val, check_row, col))
-                        print(f"  Found candidate: {num_val} at row {check_row}, col {col}")
+                        logger.debug("  Found candidate: %s at row %d, col %d", num_val, check_row, col)
             except:
                 continue
     
@@ -178,27 +752,528 @@ def find_previous_completed_sessions(ws, client_row, client_name):
         # Sort by distance from client row
         candidates_sorted = sorted(candidates, key=lambda x: abs(x[1] - client_row))
         best_candidate = candidates_sorted[0]
-        print(f"  Selected previous sessions: {best_candidate[0]} (Column C, row {best_candidate[1]})")
+        logger.debug("  Selected previous sessions: %s (Column C, row %d)", best_candidate[0], best_candidate[1])
         return best_candidate[0]
     
-    print(f"  No previous sessions number found for {client_name} in Column C")
+    logger.debug("  No previous sessions number found for %s in Column C", client_name)
     return 0
 
-def extract_client_sessions(excel_file_path=EXCEL_FILE_PATH, max_clients=MAX_CLIENTS, start_from=START_FROM):
+def match_client_header(grid, row, processed_clients, index):
     """
-    Extract client sessions from Excel file with proper color detection.
+    Return the client name whose section starts at ``row``, or None.
+
+    Recognised patterns:
+    - "Numele" in column B, client name in column C
+    - "Varsta si Greutatea" in column B, client name in column C or D
+    - A bare name in column C with session-colored cells nearby (rows
+      ``row - 5`` to ``row + 9``, answered by the SectionIndex)
+
+    Names already in ``processed_clients`` are skipped; a matched name is added to it.
+    """
+    value_b = grid.value(row, 2)
+    value_c = grid.value(row, 3)
     
-    Pattern:
-    - Row X: "Numele" in column B, client name in column C
-    - Rows below: colored cells in columns D-M (green=paid, orange=unpaid)
-    - Dates can be below OR above colored cells
-    - Green cells may contain text (stored in 'extra' property)
+    # Standard pattern: "Numele" in column B, client name in column C
+    if value_b and "Numele" in str(value_b):
+        client_name = value_c
+        if client_name and str(client_name).strip() and not _is_numeric_string(str(client_name)) and str(client_name).strip() not in processed_clients:
+            processed_clients.add(str(client_name).strip())
+            return str(client_name).strip()
+    
+    # Check column after "Varsta si Greutatea" for additional clients
+    elif value_b and "Varsta si Greutatea" in str(value_b):
+        # Check both column C and D for client name
+        for check_col in [3, 4]:  # Check columns C and D
+            value_check = grid.value(row, check_col)
+            if value_check and str(value_check).strip() and not _is_numeric_string(str(value_check)) and str(value_check).strip() not in processed_clients:
+                client_name_candidate = str(value_check).strip()
+                # Validate it's not a header or unwanted text
+                if not any(x in client_name_candidate.lower() for x in ['varsta', 'greutatea', 'motivatia', 'data']):
+                    processed_clients.add(client_name_candidate)
+                    return client_name_candidate  # Only take the first valid name found
+    
+    # Also check if there's a client name directly in column C without "Numele" marker
+    elif value_c and len(str(value_c).strip()) > 2 and not _is_numeric_string(str(value_c)):
+        # This might be a client name in a different format
+        potential_name = str(value_c).strip()
+        if potential_name not in processed_clients and not any(x in potential_name.lower() for x in ['numele', 'varsta', 'greutatea', 'data']):
+            # Double check by looking for colored cells in nearby rows
+            if index.has_session_color(max(1, row-5), min(grid.max_row, row+10)):
+                processed_clients.add(potential_name)
+                return potential_name
+    
+    return None
+
+def _is_bare_name_candidate(value_c):
+    return bool(value_c) and len(str(value_c).strip()) > 2 and not _is_numeric_string(str(value_c))
+
+class SectionIndex:
     """
-    global processed_count  # Use the module-level counter so we can print it later
-    wb = openpyxl.load_workbook(excel_file_path, data_only=True)
-    ws = wb.active
+    Row-level index of client sections, built in one pass over the rows.
+
+    - ``colored_rows_upto[r]`` counts the rows before ``r`` that hold a
+      session color in columns D-M, so "is there a colored row in
+      [start, stop)" is one subtraction instead of a 15x10 cell probe
+    - ``numele_rows`` / ``varsta_rows`` are the rows carrying the "Numele" /
+      "Varsta si Greutatea" markers in column B
+    - ``header_candidates`` flags every row that could start a client section
+      (a marker, or a plausible bare name in column C); only those rows are
+      checked by match_client_header
+    - ``client_positions`` is the resolved (row, client_name) list; section
+      boundaries (``next_client_row``, ``search_end``) are lookups into it
+
+    Rows must be added in sheet order, starting at row 1.
+    """
+
+    __slots__ = ("colored_rows_upto", "header_candidates", "numele_rows", "varsta_rows", "client_positions", "max_row")
+
+    def __init__(self):
+        self.colored_rows_upto = array("I", [0, 0])  # Rows are 1-based; index 0 is unused
+        self.header_candidates = bytearray(1)
+        self.numele_rows = []
+        self.varsta_rows = []
+        self.client_positions = []
+        self.max_row = 0
+
+    def add_row(self, grid, row):
+        """Index one row of ``grid`` (the next row after the last one added)."""
+        colored = 0
+        section_marks = FILL_CLASSIFIER.section_marks
+        for col in range(SESSION_COLUMNS_START, SESSION_COLUMNS_END):
+            if section_marks[grid.color(row, col)]:
+                colored = 1
+                break
+        self.colored_rows_upto.append(self.colored_rows_upto[-1] + colored)
+
+        value_b = grid.value(row, 2)
+        candidate = 0
+        if value_b and "Numele" in str(value_b):
+            self.numele_rows.append(row)
+            candidate = 1
+        elif value_b and "Varsta si Greutatea" in str(value_b):
+            self.varsta_rows.append(row)
+            candidate = 1
+        elif _is_bare_name_candidate(grid.value(row, 3)):
+            candidate = 1
+        self.header_candidates.append(candidate)
+        self.max_row = row
+
+    def has_session_color(self, start, stop):
+        """True if any row in [start, stop) has a session-colored cell in columns D-M."""
+        if stop <= start:
+            return False
+        return self.colored_rows_upto[stop] > self.colored_rows_upto[start]
+
+    def is_header_candidate(self, row):
+        return self.header_candidates[row] == 1
+
+    def resolve_clients(self, grid):
+        """Resolve client headers from the candidate rows. Returns the client_positions list."""
+        processed_clients = set()  # Track processed clients to avoid duplicates
+        self.client_positions = []
+        for row in range(1, self.max_row + 1):
+            if self.header_candidates[row]:
+                client_name = match_client_header(grid, row, processed_clients, self)
+                if client_name:
+                    self.client_positions.append((row, client_name))
+        return self.client_positions
+
+    def next_client_row(self, position):
+        """Row of the client after ``client_positions[position]`` (end of sheet for the last client)."""
+        if position + 1 < len(self.client_positions):
+            return self.client_positions[position + 1][0]
+        return self.max_row
+
+    def search_end(self, position):
+        """Exclusive end row of the section scanned for ``client_positions[position]``."""
+        client_row = self.client_positions[position][0]
+        return min(client_row + SEARCH_ROWS_PER_CLIENT, self.next_client_row(position))
+
+def build_section_index(grid):
+    """Index every row of the grid in one pass and resolve the client headers."""
+    index = SectionIndex()
+    for row in range(1, grid.max_row + 1):
+        index.add_row(grid, row)
+    index.resolve_clients(grid)
+    return index
+
+def first_changed_row(old_grid, grid):
+    """First row whose values or colors differ between two grids (max_row + 1 of the shorter one if none do)."""
+    stride = grid.stride
+    for row in range(max(grid.base_row, 1), min(old_grid.max_row, grid.max_row) + 1):
+        start = (row - grid.base_row) * stride
+        if (old_grid.values[start:start + stride] != grid.values[start:start + stride]
+                or old_grid.colors[start:start + stride] != grid.colors[start:start + stride]):
+            return row
+    return min(old_grid.max_row, grid.max_row) + 1
+
+def update_section_index(index, old_grid, grid):
+    """
+    SectionIndex for ``grid``, reusing the rows of ``index`` (built for
+    ``old_grid``) above the first changed row. add_row only reads its own
+    row, so those entries are still valid; the rest is indexed as usual and
+    the client headers are resolved again.
+    """
+    if index is None or old_grid is None or (old_grid.base_row, old_grid.stride) != (grid.base_row, grid.stride):
+        return build_section_index(grid)
+    kept = first_changed_row(old_grid, grid) - 1
+    updated = SectionIndex()
+    updated.colored_rows_upto = index.colored_rows_upto[:kept + 2]
+    updated.header_candidates = index.header_candidates[:kept + 1]
+    updated.numele_rows = [row for row in index.numele_rows if row <= kept]
+    updated.varsta_rows = [row for row in index.varsta_rows if row <= kept]
+    updated.max_row = kept
+    for row in range(kept + 1, grid.max_row + 1):
+        updated.add_row(grid, row)
+    updated.resolve_clients(grid)
+    return updated
+
+def scan_client_section(grid, client_row, client_name, search_end, counters=None):
+    """
+    Scan one client's section (rows ``client_row + 1`` to ``search_end``) for sessions.
+
+    Returns the raw scan: ``previous_completed``, the "d.m" dates of ``paid``
+    and ``unpaid`` cells in sheet order, ``extra`` text from green cells and the
+    ``undated_paid`` count. Nothing here depends on today's date, so scans can
+    be cached across runs; build_client_data() turns a scan into client data.
+
+    If a ``counters`` Counter is given, the work done is added to it (see METRIC_COUNTERS).
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    session_kinds = FILL_CLASSIFIER.kinds
+    cells_scanned = colored_cells = lookups_below = lookups_above = parse_failures = 0
+
+    # Look for previous completed sessions in Column C, 3-7 rows below client name
+    previous_completed = find_previous_completed_sessions(grid, client_row, client_name)
+    logger.debug("Previous completed sessions: %s", previous_completed)
     
-    clients_data = {
+    paid_sessions = []
+    unpaid_sessions = []
+    extra_data = []  # Store text from green cells
+    undated_paid_count = 0  # Count green cells with no date (pre-paid sessions remaining)
+    
+    # STEP 1: Find the very FIRST colored cell (green or orange) that has a date
+    # above or below it - this is the reference point for counting.
+    first_green_with_date_row = None
+    first_green_with_date_col = None
+    
+    for row in range(client_row + 1, search_end):
+        for col in range(SESSION_COLUMNS_START, SESSION_COLUMNS_END):  # Check columns D-M left to right
+            cells_scanned += 1
+            session_type = session_kinds[grid.color(row, col)]
+            if session_type is None:
+                continue
+            
+            colored_cells += 1
+            lookups_below += 1
+            date_value = grid.value(row + 1, col)
+            if not date_value:
+                lookups_above += 1
+                date_value = grid.value(row - 1, col)
+            if date_value:
+                first_green_with_date_row = row
+                first_green_with_date_col = col
+                if debug:
+                    logger.debug(f"  🎯 FIRST date found at row {row}, col {col}, date: {date_value}" + (" (ORANGE)" if session_type == "unpaid" else ""))
+                break
+        
+        if first_green_with_date_row:
+            break
+    
+    if not first_green_with_date_row:
+        logger.info("  ❌ No green cells with dates found for %s", client_name)
+        if counters is not None:
+            counters.update(cells_scanned=cells_scanned, colored_cells=colored_cells,
+                            date_lookups_below=lookups_below, date_lookups_above=lookups_above)
+        return {"previous_completed": previous_completed, "paid": [], "unpaid": [], "extra": [], "undated_paid": 0}
+    
+    # STEP 2: Count sessions only from the first colored cell with date onwards
+    for row in range(first_green_with_date_row, search_end):
+        # Only count cells at or after the first colored cell with date
+        col_start = first_green_with_date_col if row == first_green_with_date_row else SESSION_COLUMNS_START
+        
+        for col in range(col_start, SESSION_COLUMNS_END):  # Columns D-M
+            cells_scanned += 1
+            session_type = session_kinds[grid.color(row, col)]
+            if session_type is None:
+                continue
+            
+            colored_cells += 1
+            cell_text = None
+            if session_type == "paid":
+                cell_text_raw = grid.value(row, col)
+                # Only keep non-numeric text. If the cell contains something that can be
+                # converted to a number (e.g. 30, 25.5, "30.0"), ignore it for the `extra` list.
+                if cell_text_raw is not None and str(cell_text_raw).strip():
+                    cleaned_text = str(cell_text_raw).strip()
+                    try:
+                        # Replace comma with dot to support European decimals like "25,5"
+                        float(cleaned_text.replace(",", "."))
+                    except ValueError:
+                        # Not a pure number
+                        cell_text = cleaned_text
+            
+            # Check for dates: first below, then above if not found
+            lookups_below += 1
+            date_value = grid.value(row + 1, col)
+            if not date_value:
+                lookups_above += 1
+                date_value = grid.value(row - 1, col)
+            
+            if date_value:
+                date_str = str(date_value).strip()
+                
+                # Convert date format from "2024-06-10 00:00:00" to "10.6"
+                try:
+                    # Handle datetime objects or date strings
+                    if hasattr(date_value, 'date'):
+                        # It's a datetime object
+                        date_obj = date_value.date()
+                        day = date_obj.day
+                        month = date_obj.month
+                    elif "-" in date_str and len(date_str) >= 10:
+                        # It's a string like "2024-06-10" or "2024-06-10 00:00:00"
+                        date_part = date_str.split()[0]  # Remove time part if present
+                        parts = date_part.split("-")
+                        if len(parts) >= 3:
+                            day = int(parts[2])
+                            month = int(parts[1])
+                        else:
+                            parse_failures += 1
+                            continue
+                    else:
+                        parse_failures += 1
+                        continue
+                    
+                    formatted_date = f"{day}.{month}"
+                    
+                    # Store session data
+                    if session_type == "paid":
+                        paid_sessions.append(formatted_date)
+                        # Store extra text if present
+                        if cell_text:
+                            extra_data.append({"date": formatted_date, "text": cell_text})
+                    else:
+                        unpaid_sessions.append(formatted_date)
+                    
+                    if debug:
+                        logger.debug(f"  Found {session_type} session: {formatted_date}" + (f" (extra: {cell_text})" if cell_text else ""))
+                except Exception as e:
+                    parse_failures += 1
+                    logger.warning("  Could not parse date for %s at row %d, col %d: %s - %s", client_name, row, col, date_str, e)
+            else:
+                # No date found – special handling for paid cells (green)
+                if session_type == "paid":
+                    undated_paid_count += 1  # Treat as an already purchased session without specified date
+                if debug:
+                    logger.debug(f"  No date found for {session_type} cell in column {col}" + (" (counting as paid)" if session_type == "paid" else ""))
+    
+    if counters is not None:
+        counters.update(cells_scanned=cells_scanned, colored_cells=colored_cells, date_lookups_below=lookups_below,
+                        date_lookups_above=lookups_above, date_parse_failures=parse_failures)
+    return {
+        "previous_completed": previous_completed,
+        "paid": paid_sessions,
+        "unpaid": unpaid_sessions,
+        "extra": extra_data,
+        "undated_paid": undated_paid_count
+    }
+
+def build_client_data(scan, client_name=None):
+    """
+    Turn a raw section scan into a ClientRecord: session counts, stats and optional extra text.
+
+    The dates stay raw "d.m" strings in ``pending_dates``; resolve_client_dates()
+    gives all clients their years in one batch afterwards (the stats don't depend on them).
+    """
+    previous_completed = scan["previous_completed"]
+    extra_data = scan["extra"]
+    undated_paid_count = scan["undated_paid"]
+    paid_dates = scan["paid"]
+    unpaid_dates = scan["unpaid"]
+    
+    # Calculate stats
+    #   • previous_completed: sessions completed before this tracking method
+    #   • paid_used: dated green cells (sessions already taken)
+    #   • remaining: undated green cells (pre-paid sessions still available)
+    #   • unpaid:    orange cells with dates (taken but unpaid)
+    paid_used = len(paid_dates)
+    remaining = undated_paid_count  # Exactly how many undated paid sessions are left
+    total_paid_sessions = paid_used + remaining
+    total_current = total_paid_sessions + len(unpaid_dates)
+    total_all_time = previous_completed + total_current
+    
+    record = ClientRecord(client_name, previous_completed=previous_completed, remaining=remaining,
+                               paid_used=paid_used, unpaid_count=len(unpaid_dates), extra=extra_data or None)
+    record.pending_dates = (list(paid_dates), list(unpaid_dates))
+    
+    extra_count = len(extra_data) if extra_data else 0
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"  Summary: Previous={previous_completed}, Current={paid_used} used + {remaining} remaining + {len(unpaid_dates)} unpaid = {total_current}, Total={total_all_time}" + (f", {extra_count} with extra text" if extra_count > 0 else ""))
+    return record
+
+def section_last_row(grid, client_row, search_end):
+    """Last row scan_client_section reads for a client (date lookups and the previous-sessions search)."""
+    return min(max(search_end, client_row + PREVIOUS_SESSIONS_SEARCH_END - 1), grid.max_row)
+
+def _scan_section_job(job):
+    """Process-pool entry point: scan one section, capturing its console output, work counters and time."""
+    grid, client_row, client_name, search_end, header = job
+    log = io.StringIO()
+    counters = Counter()
+    started = perf_counter()
+    with contextlib.redirect_stdout(log):
+        logger.info(header)
+        scan = scan_client_section(grid, client_row, client_name, search_end, counters)
+    return scan, log.getvalue(), counters, perf_counter() - started
+
+def section_fingerprint(section, client_row, client_name, search_end):
+    """
+    Hash everything scan_client_section reads for one client.
+
+    ``section`` holds the client's rows (see section_last_row); rows are
+    hashed relative to ``client_row`` so inserting rows above a client does
+    not invalidate its result.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((client_name, search_end - client_row, section.values, section.colors)).encode("utf-8"))
+    return digest.hexdigest()
+
+class SectionCache:
+    """
+    Section scans of previous runs keyed by section fingerprint.
+
+    Scans don't depend on today's date, so entries stay valid across days;
+    they are only dropped when the configuration or SECTION_CACHE_VERSION
+    changes. ``save()`` keeps just the sections seen in this run, so the
+    file never outgrows the sheet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.settings = {
+            "version": SECTION_CACHE_VERSION,
+            "config": [SESSION_COLUMNS_START, SESSION_COLUMNS_END,
+                       PREVIOUS_SESSIONS_SEARCH_START, PREVIOUS_SESSIONS_SEARCH_END, MIN_PREVIOUS_SESSIONS,
+                       MAX_PREVIOUS_SESSIONS, [[key, kind] for key, kind in sorted(FILL_CLASSIFIER.palette.items())]]
+        }
+        self.sections = {}
+        self.used = {}
+        self.reused = 0
+        self.recomputed = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("settings") == self.settings:
+                self.sections = stored.get("sections", {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @classmethod
+    def for_sheet(cls, excel_file_path, sheet_name=None):
+        """Cache file for one sheet of a workbook, kept in CACHE_DIR next to it."""
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), CACHE_DIR)
+        name = f"{os.path.basename(excel_file_path)}.{_slugify(sheet_name or 'active')}.sections.json"
+        return cls(os.path.join(cache_dir, name))
+
+    def get(self, fingerprint):
+        scan = self.sections.get(fingerprint)
+        if scan is None:
+            return None
+        self.reused += 1
+        self.used[fingerprint] = scan
+        return copy.deepcopy(scan)
+
+    def put(self, fingerprint, scan):
+        self.recomputed += 1
+        self.used[fingerprint] = copy.deepcopy(scan)
+
+    def summary(self):
+        return {"reused": self.reused, "recomputed": self.recomputed}
+
+    def start_run(self):
+        """Begin another run in the same process: this run's sections become the ones to reuse."""
+        if self.used:
+            self.sections = self.used
+        self.used = {}
+        self.reused = self.recomputed = 0
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"settings": self.settings, "sections": self.used}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def extract_sections(jobs, workers=1, cache=None, metrics=None):
+    """
+    Run scan_client_section (plus build_client_data) for each job and yield (client_name, client_data) in job order.
+
+    Each job is ``(grid, client_row, client_name, search_end, header)``;
+    ``header`` is printed before the section's own output.
+
+    With a SectionCache, sections whose fingerprint is unchanged since the
+    last run reuse the cached scan instead of being re-scanned.
+
+    With workers > 1 the sections are sharded across a process pool: each
+    worker receives only the rows its section needs, at most ``workers * 4``
+    sections are in flight, and worker output is replayed in job order, so
+    both the results and the console log match a serial run.
+
+    With an ExtractionMetrics, each section's counters and scan time are
+    added to it.
+    """
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(ProcessPoolExecutor(
+            max_workers=workers, initializer=configure_logging, initargs=(logger.level,))) if workers > 1 else None
+        in_flight = deque()
+
+        def finish_oldest():
+            client_name, client_row, fingerprint, future = in_flight.popleft()
+            scan, log, counters, seconds = future.result()
+            if executor and counters:
+                profiling.record("client scan (workers)", seconds)
+            print(log, end="")
+            if fingerprint and cache is not None:
+                cache.put(fingerprint, scan)
+            if metrics is not None:
+                metrics.counters.update(counters)
+                metrics.add_client(client_name, client_row, seconds, cached=cache is not None and not fingerprint)
+            return client_name, build_client_data(scan, client_name)
+
+        for grid, client_row, client_name, search_end, header in jobs:
+            fingerprint = None
+            section = grid
+            if cache is not None or executor:
+                section = grid.section(client_row, section_last_row(grid, client_row, search_end))
+
+            if cache is not None:
+                fingerprint = section_fingerprint(section, client_row, client_name, search_end)
+                cached = cache.get(fingerprint)
+                if cached is not None:
+                    future = Future()
+                    log = f"{header}\n  ♻️ Section unchanged - reusing cached scan\n" if logger.isEnabledFor(logging.INFO) else ""
+                    future.set_result((cached, log, Counter(), 0.0))
+                    in_flight.append((client_name, client_row, None, future))
+                    continue
+
+            job = (section, client_row, client_name, search_end, header)
+            if executor:
+                future = executor.submit(_scan_section_job, job)
+            else:
+                future = Future()
+                with profiling.phase("client scan"):
+                    future.set_result(_scan_section_job(job))
+            in_flight.append((client_name, client_row, fingerprint, future))
+
+            while len(in_flight) >= (workers * 4 if executor else 1):
+                yield finish_oldest()
+        while in_flight:
+            yield finish_oldest()
+
+def new_clients_data():
+    """Create the empty top-level result structure returned by extract_client_sessions."""
+    return {
         "clients": {},
         "updated": datetime.now().strftime("%Y-%m-%d"),
         "date_enhancement": {
@@ -208,461 +1283,973 @@ def extract_client_sessions(excel_file_path=EXCEL_FILE_PATH, max_clients=MAX_CLI
             "format": "DD.MM.YYYY"
         }
     }
+
+def extract_client_sessions(excel_file_path=EXCEL_FILE_PATH, max_clients=MAX_CLIENTS, start_from=START_FROM, workers=1, sheet_name=None, cache=None, use_grid_cache=False, backend="openpyxl", metrics=None):
+    """
+    Extract client sessions from Excel file with proper color detection.
     
-    # Find all "Numele" positions (check both column B and C for client names)
-    numele_positions = []
-    processed_clients = set()  # Track processed clients to avoid duplicates
+    Pattern:
+    - Row X: "Numele" in column B, client name in column C
+    - Rows below: colored cells in columns D-M (green=paid, orange=unpaid)
+    - Dates can be below OR above colored cells
+    - Green cells may contain text (stored in 'extra' property)
+
+    The worksheet is read once into a SheetGrid; discovery, counting and
+    date lookups all run against that snapshot. With workers > 1 client
+    sections are extracted in parallel, and with a SectionCache unchanged
+    sections reuse the previous run's result (see extract_sections). With
+    use_grid_cache the parsed sheet itself is cached, and ``backend`` picks
+    the workbook parser (see load_sheet_grid). Work counters and per-client
+    timings are collected into ``metrics`` if given.
+    """
+    with profiling.phase("workbook load"):
+        grid = load_sheet_grid(excel_file_path, sheet_name, use_cache=use_grid_cache, backend=backend)
     
-    for row in range(1, ws.max_row + 1):
-        cell_b = ws.cell(row=row, column=2)
-        cell_c = ws.cell(row=row, column=3)
-        
-        # Standard pattern: "Numele" in column B, client name in column C
-        if cell_b.value and "Numele" in str(cell_b.value):
-            client_name = cell_c.value
-            if client_name and str(client_name).strip() and not _is_numeric_string(str(client_name)) and str(client_name).strip() not in processed_clients:
-                numele_positions.append((row, str(client_name).strip()))
-                processed_clients.add(str(client_name).strip())
-        
-        # Check column after "Varsta si Greutatea" for additional clients
-        elif cell_b.value and "Varsta si Greutatea" in str(cell_b.value):
-            # Check both column C and D for client name
-            for check_col in [3, 4]:  # Check columns C and D
-                cell_check = ws.cell(row=row, column=check_col)
-                if cell_check.value and str(cell_check.value).strip() and not _is_numeric_string(str(cell_check.value)) and str(cell_check.value).strip() not in processed_clients:
-                    client_name_candidate = str(cell_check.value).strip()
-                    # Validate it's not a header or unwanted text
-                    if not any(x in client_name_candidate.lower() for x in ['varsta', 'greutatea', 'motivatia', 'data']):
-                        numele_positions.append((row, client_name_candidate))
-                        processed_clients.add(client_name_candidate)
-                        break  # Only take the first valid name found
-        
-        # Also check if there's a client name directly in column C without "Numele" marker
-        elif cell_c.value and len(str(cell_c.value).strip()) > 2 and not _is_numeric_string(str(cell_c.value)):
-            # This might be a client name in a different format
-            potential_name = str(cell_c.value).strip()
-            if potential_name not in processed_clients and not any(x in potential_name.lower() for x in ['numele', 'varsta', 'greutatea', 'data']):
-                # Double check by looking for colored cells in nearby rows
-                has_colored_cells = False
-                for check_row in range(max(1, row-5), min(ws.max_row, row+10)):
-                    for col in range(4, 14):
-                        cell = ws.cell(row=check_row, column=col)
-                        if cell.fill and cell.fill.fgColor and cell.fill.fgColor.rgb:
-                            rgb = str(cell.fill.fgColor.rgb)
-                            if rgb in ["FF00FF00", "FFFF9900"] or "FF99" in rgb:
-                                has_colored_cells = True
-                                break
-                    if has_colored_cells:
-                        break
-                
-                if has_colored_cells:
-                    numele_positions.append((row, potential_name))
-                    processed_clients.add(potential_name)
+    # Find all "Numele" positions (check both column B and C for client names)
+    with profiling.phase("client discovery"):
+        index = build_section_index(grid)
+    return extract_grid_sessions(grid, index, max_clients, start_from, workers, cache, metrics)
+
+def extract_grid_sessions(grid, index, max_clients=MAX_CLIENTS, start_from=START_FROM, workers=1, cache=None, metrics=None):
+    """Extract the clients of an already loaded SheetGrid and its SectionIndex (see extract_client_sessions)."""
+    global processed_count  # Use the module-level counter so we can print it later
+    clients_data = new_clients_data()
+    numele_positions = index.client_positions
     
-    print(f"Found {len(numele_positions)} clients total, processing {min(max_clients, len(numele_positions)-start_from)} starting from position {start_from+1}")
+    logger.info("Found %d clients total, processing %d starting from position %d", len(numele_positions), min(max_clients, len(numele_positions)-start_from), start_from+1)
     
     # Process clients from start_from to start_from + max_clients
     end_index = min(start_from + max_clients, len(numele_positions))
+    total = min(max_clients, len(numele_positions)-start_from)
     processed_count = 0
     
-    for i, (client_row, client_name) in enumerate(numele_positions[start_from:end_index]):
+    def jobs():
+        for actual_index in range(start_from, end_index):
+            client_row, client_name = numele_positions[actual_index]
+            # Look for session data in the next rows after client name
+            next_client_row = index.next_client_row(actual_index)
+            search_end = index.search_end(actual_index)
+            header = (f"\n[{actual_index - start_from + 1}/{total}] Processing: {client_name} (row {client_row})\n"
+                      f"  Search range: rows {client_row+1} to {search_end} (next client at {next_client_row})")
+            yield grid, client_row, client_name, search_end, header
+    
+    for client_name, client_data in extract_sections(jobs(), workers, cache, metrics):
         processed_count += 1
-        print(f"\n[{processed_count}/{min(max_clients, len(numele_positions)-start_from)}] Processing: {client_name} (row {client_row})")
-        
-        # Look for previous completed sessions in Column C, 3-7 rows below client name
-        previous_completed = find_previous_completed_sessions(ws, client_row, client_name)
-        print(f"Previous completed sessions: {previous_completed}")
-        
-        paid_sessions = []
-        unpaid_sessions = []
-        extra_data = []  # Store text from green cells
-        undated_paid_count = 0  # Count green cells with no date (pre-paid sessions remaining)
-        
-        # Look for session data in the next rows after client name
-        actual_index = start_from + i
-        next_client_row = numele_positions[actual_index + 1][0] if actual_index + 1 < len(numele_positions) else ws.max_row
-        search_end = min(client_row + SEARCH_ROWS_PER_CLIENT, next_client_row)
-        print(f"  Search range: rows {client_row+1} to {search_end} (next client at {next_client_row})")
-        
-        # STEP 1: Find the first green cell with a date to establish reference point
-        # Strategy: Find the first ROW that has any dates, then find the leftmost green cell in that row
-        first_green_with_date_row = None
-        first_green_with_date_col = None
-        
-        # Find the very FIRST date chronologically (earliest position)
-        # Check both green (paid) and orange (unpaid) cells as valid starting points
-        for row in range(client_row + 1, search_end):
-            for col in range(SESSION_COLUMNS_START, SESSION_COLUMNS_END):  # Check columns D-M left to right
-                # Check if there's a colored cell here
-                cell = ws.cell(row=row, column=col)
-                
-                if cell.fill and cell.fill.fgColor and cell.fill.fgColor.rgb:
-                    rgb = str(cell.fill.fgColor.rgb)
-                    
-                    # Skip default/empty colors
-                    if rgb == COLOR_DEFAULT_BLACK or rgb == COLOR_DEFAULT_WHITE:
-                        continue
-                    
-                    # Check if it's a green cell (paid) OR orange cell (unpaid)
-                    if rgb == COLOR_PAID_GREEN:
-                        # Check if this green cell has a date
-                        date_cell_below = ws.cell(row=row + 1, column=col)
-                        date_cell_above = ws.cell(row=row - 1, column=col)
-                        
-                        if date_cell_below.value or date_cell_above.value:
-                            first_green_with_date_row = row
-                            first_green_with_date_col = col
-                            date_value = date_cell_below.value or date_cell_above.value
-                            print(f"  🎯 FIRST date found at row {row}, col {col}, date: {date_value}")
-                            break
-                    # Also check orange/yellow cells (unpaid) as potential starting points
-                    elif rgb == COLOR_UNPAID_ORANGE or "FF99" in rgb or ("FFFF" in rgb[:4] and rgb != COLOR_DEFAULT_WHITE):
-                        # Check if this orange cell has a date
-                        date_cell_below = ws.cell(row=row + 1, column=col)
-                        date_cell_above = ws.cell(row=row - 1, column=col)
-                        
-                        if date_cell_below.value or date_cell_above.value:
-                            first_green_with_date_row = row
-                            first_green_with_date_col = col
-                            date_value = date_cell_below.value or date_cell_above.value
-                            print(f"  🎯 FIRST date found at row {row}, col {col}, date: {date_value} (ORANGE)")
-                            break
-            
-            if first_green_with_date_row:
-                break
-        
-        if not first_green_with_date_row:
-            print(f"  ❌ No green cells with dates found for {client_name}")
-            # Create empty client data
-            client_data = {
-                "paid": [],
-                "unpaid": [],
-                "stats": {
-                    "previous_completed": previous_completed,
-                    "current_paid_used": 0,
-                    "current_remaining": 0,
-                    "current_unpaid": 0,
-                    "total_current": 0,
-                    "total_all_time": previous_completed,
-                    # Legacy compatibility
-                    "total": 0,
-                    "paid": 0,
-                    "paid_used": 0,
-                    "paid_remaining": 0,
-                    "unpaid": 0
-                }
-            }
-            clients_data["clients"][client_name] = client_data
-            print(f"  Summary: Previous={previous_completed}, Current=0 used + 0 remaining + 0 unpaid = 0, Total={previous_completed}")
+        clients_data["clients"][client_name] = client_data
+    
+    resolve_client_dates(clients_data["clients"])
+    if cache is not None:
+        clients_data["cache"] = cache.summary()
+    return clients_data
+
+# Streaming mode: rows past a candidate header the bare-name check needs indexed
+HEADER_LOOKAHEAD_ROWS = 10
+
+class RowWindow:
+    """
+    SheetGrid-compatible view over a bounded, sliding range of streamed rows.
+
+    Rows are appended as the read-only worksheet yields them and evicted as
+    soon as no pending client section or header check can reach them.
+    """
+
+    __slots__ = ("rows", "first_row", "max_row")
+
+    def __init__(self):
+        self.rows = {}
+        self.first_row = 1
+        self.max_row = 0
+
+    def append(self, row, values, colors):
+        self.rows[row] = (values, colors)
+        self.max_row = row
+
+    def evict_before(self, row):
+        while self.first_row < row:
+            self.rows.pop(self.first_row, None)
+            self.first_row += 1
+
+    def value(self, row, col):
+        entry = self.rows.get(row)
+        return entry[0][col] if entry else None
+
+    def color(self, row, col):
+        entry = self.rows.get(row)
+        return entry[1][col] if entry else None
+
+    def section(self, first_row, last_row, stride=GRID_COLUMNS + 1):
+        """Copy rows first_row..last_row into a standalone SheetGrid that outlives the window."""
+        values = []
+        colors = []
+        empty = [None] * stride
+        for row in range(first_row, last_row + 1):
+            row_values, row_colors = self.rows.get(row, (empty, empty))
+            values.extend(row_values)
+            colors.extend(row_colors)
+        return SheetGrid(values, colors, first_row, last_row, stride)
+
+def _streamed_row(cells, rgb_by_style_id, stride=GRID_COLUMNS + 1):
+    """Turn one read-only row of cells into (values, colors) lists indexed by column."""
+    values = [None] * stride
+    colors = [None] * stride
+    for col, cell in enumerate(cells, start=1):
+        values[col] = cell.value
+        style_id = getattr(cell, "_style_id", None)  # EmptyCell has no style
+        if style_id is None:
             continue
-        
-        # STEP 2: Count sessions only from the first green cell with date onwards
-        for row in range(client_row + 1, search_end):
-            # Check for colored cells in columns D-M (4-13)
-            colored_cells = []
-            
-            for col in range(SESSION_COLUMNS_START, SESSION_COLUMNS_END):  # Columns D-M
-                cell = ws.cell(row=row, column=col)
-                
-                # Only count cells at or after the first green cell with date
-                if row < first_green_with_date_row or (row == first_green_with_date_row and col < first_green_with_date_col):
+        if style_id not in rgb_by_style_id:
+            rgb_by_style_id[style_id] = _cell_rgb(cell)
+        colors[col] = rgb_by_style_id[style_id]
+    return values, colors
+
+def stream_client_sections(excel_file_path=EXCEL_FILE_PATH, sheet_name=None):
+    """
+    Stream one sheet (the active one by default) in read-only mode and yield client sections as soon as they are complete.
+
+    Yields ``(client_row, client_name, search_end, next_client_row, window)``.
+    A section is complete once the next client header is confirmed or once
+    SEARCH_ROWS_PER_CLIENT rows have passed without one (``next_client_row`` is
+    None then). ``window`` is a RowWindow holding every row the section needs;
+    it is only valid until the generator is resumed. At most
+    SEARCH_ROWS_PER_CLIENT + HEADER_LOOKAHEAD_ROWS rows are resident at a time.
+    """
+    wb = openpyxl.load_workbook(excel_file_path, data_only=True, read_only=True)
+    try:
+        window = RowWindow()
+        index = SectionIndex()
+        processed_clients = set()
+        rgb_by_style_id = {}
+        pending = None  # (client_row, client_name) whose section is still open
+        next_header_row = 1  # First row not yet checked for a client header
+        last_row = 0
+
+        ws = wb[sheet_name] if sheet_name else wb.active
+        rows = enumerate(ws.iter_rows(max_col=GRID_COLUMNS), start=1)
+        while True:
+            row_cells = next(rows, None)
+            if row_cells is not None:
+                last_row, cells = row_cells
+                window.append(last_row, *_streamed_row(cells, rgb_by_style_id))
+                index.add_row(window, last_row)
+                # A header row can be decided once its lookahead rows are in the window
+                decide_upto = last_row - HEADER_LOOKAHEAD_ROWS
+            else:
+                decide_upto = last_row
+
+            while next_header_row <= decide_upto:
+                row = next_header_row
+                next_header_row += 1
+
+                # No header within the search range: the pending section is already complete
+                if pending and row > pending[0] + SEARCH_ROWS_PER_CLIENT:
+                    yield pending[0], pending[1], pending[0] + SEARCH_ROWS_PER_CLIENT, None, window
+                    pending = None
+
+                if not index.is_header_candidate(row):
                     continue
-                
-                # Simplified debug: just count
-                # (removed detailed per-cell logging for cleaner output)
-                
-                if cell.fill and cell.fill.fgColor and cell.fill.fgColor.rgb:
-                    rgb = str(cell.fill.fgColor.rgb)
-                    
-                    # Skip default/empty colors
-                    if rgb == COLOR_DEFAULT_BLACK or rgb == COLOR_DEFAULT_WHITE:
-                        continue
-                    
-                    # Green cells = paid (FF00FF00)
-                    if rgb == COLOR_PAID_GREEN:
-                        cell_text_raw = cell.value
-                        # Only keep non-numeric text. If the cell contains something that can be
-                        # converted to a number (e.g. 30, 25.5, "30.0"), ignore it for the `extra` list.
-                        if cell_text_raw is not None and str(cell_text_raw).strip():
-                            cleaned_text = str(cell_text_raw).strip()
-                            # Detect numeric values (integers or floats, dot or comma as decimal)
-                            is_numeric = False
-                            try:
-                                # Replace comma with dot to support European decimals like "25,5"
-                                float(cleaned_text.replace(",", "."))
-                                # Succeeded => numeric
-                                is_numeric = True
-                            except ValueError:
-                                # Not a pure number
-                                pass
-                            if not is_numeric:
-                                colored_cells.append((col, "paid", cleaned_text))
-                            else:
-                                colored_cells.append((col, "paid", None))
-                        else:
-                            colored_cells.append((col, "paid", None))
-                    # Orange/yellow cells = unpaid (FFFF9900 or similar)
-                    elif rgb == COLOR_UNPAID_ORANGE or "FF99" in rgb or ("FFFF" in rgb[:4] and rgb != COLOR_DEFAULT_WHITE):
-                        colored_cells.append((col, "unpaid", None))
-            
-            # If we found colored cells, check for dates (first below, then above if not found)
-            if colored_cells:
-                for col_data in colored_cells:
-                    if len(col_data) == 3:
-                        col, session_type, cell_text = col_data
-                    else:
-                        col, session_type = col_data[0], col_data[1]
-                        cell_text = None
-                    
-                    # First check below (row + 1)
-                    date_cell_below = ws.cell(row=row + 1, column=col)
-                    date_cell_above = ws.cell(row=row - 1, column=col)
-                    
-                    date_found = False
-                    
-                    # Try below first
-                    if date_cell_below.value:
-                        date_cell = date_cell_below
-                        date_found = True
-                    # If not found below, try above
-                    elif date_cell_above.value:
-                        date_cell = date_cell_above
-                        date_found = True
-                    
-                    if date_found:
-                        date_str = str(date_cell.value).strip()
-                        
-                        # Convert date format from "2024-06-10 00:00:00" to "10.6"
-                        try:
-                            # Handle datetime objects or date strings
-                            if hasattr(date_cell.value, 'date'):
-                                # It's a datetime object
-                                date_obj = date_cell.value.date()
-                                day = date_obj.day
-                                month = date_obj.month
-                            elif "-" in date_str and len(date_str) >= 10:
-                                # It's a string like "2024-06-10" or "2024-06-10 00:00:00"
-                                date_part = date_str.split()[0]  # Remove time part if present
-                                parts = date_part.split("-")
-                                if len(parts) >= 3:
-                                    day = int(parts[2])
-                                    month = int(parts[1])
-                                else:
-                                    continue
-                            else:
-                                continue
-                            
-                            formatted_date = f"{day}.{month}"
-                            
-                            # Store session data
-                            if session_type == "paid":
-                                paid_sessions.append(formatted_date)
-                                # Store extra text if present
-                                if cell_text:
-                                    extra_data.append({"date": formatted_date, "text": cell_text})
-                            else:
-                                unpaid_sessions.append(formatted_date)
-                            
-                            print(f"  Found {session_type} session: {formatted_date}" + (f" (extra: {cell_text})" if cell_text else ""))
-                        except Exception as e:
-                            print(f"  Could not parse date: {date_str} - {e}")
-                    else:
-                        # No date found – special handling for paid cells (green)
-                        if session_type == "paid":
-                            undated_paid_count += 1  # Treat as an already purchased session without specified date
-                        print(f"  No date found for {session_type} cell in column {col}" + (" (counting as paid)" if session_type == "paid" else ""))
-        
-        # Enhance dates with proper years and chronological sorting
-        enhanced_paid = enhance_session_dates(paid_sessions)
-        enhanced_unpaid = enhance_session_dates(unpaid_sessions)
-        
-        # Calculate stats
-        #   • previous_completed: sessions completed before this tracking method
-        #   • paid_used: dated green cells (sessions already taken)
-        #   • remaining: undated green cells (pre-paid sessions still available)
-        #   • unpaid:    orange cells with dates (taken but unpaid)
-        paid_used = len(enhanced_paid)
-        remaining = undated_paid_count  # Exactly how many undated paid sessions are left
-        total_paid_sessions = paid_used + remaining
-        total_current = total_paid_sessions + len(enhanced_unpaid)
-        total_all_time = previous_completed + total_current
-        
-        # Add client data with enhanced dates
-        client_data = {
-            "paid": enhanced_paid,
-            "unpaid": enhanced_unpaid,
-            "stats": {
-                "previous_completed": previous_completed,
-                "current_paid_used": paid_used,
-                "current_remaining": remaining,
-                "current_unpaid": len(enhanced_unpaid),
-                "total_current": total_current,
-                "total_all_time": total_all_time,
-                # Legacy compatibility
-                "total": total_current,
-                "paid": total_paid_sessions,
-                "paid_used": paid_used,
-                "paid_remaining": remaining,
-                "unpaid": len(enhanced_unpaid)
-            }
-        }
-        
-        # Add extra data if present
-        if extra_data:
-            client_data["extra"] = extra_data
-        
+                client_name = match_client_header(window, row, processed_clients, index)
+                if client_name:
+                    index.client_positions.append((row, client_name))
+                    if pending:
+                        yield pending[0], pending[1], min(pending[0] + SEARCH_ROWS_PER_CLIENT, row), row, window
+                    pending = (row, client_name)
+
+            if row_cells is None:
+                break
+
+            oldest_needed = next_header_row
+            if pending:
+                oldest_needed = min(oldest_needed, pending[0])
+            window.evict_before(oldest_needed)
+
+        # The last client's section runs to the end of the sheet
+        if pending:
+            yield pending[0], pending[1], min(pending[0] + SEARCH_ROWS_PER_CLIENT, last_row), last_row, window
+    finally:
+        wb.close()
+
+def extract_client_sessions_streaming(excel_file_path=EXCEL_FILE_PATH, max_clients=MAX_CLIENTS, start_from=START_FROM, workers=1, sheet_name=None, cache=None, metrics=None):
+    """
+    Streaming variant of extract_client_sessions built on read-only ``iter_rows``.
+
+    Only a bounded window of rows is kept in memory and each client is
+    extracted as soon as its section is complete, so peak memory stays flat
+    regardless of sheet length. Produces the same result as extract_client_sessions.
+    """
+    global processed_count
+    clients_data = new_clients_data()
+    end_index = start_from + max_clients
+    processed_count = 0
+    
+    def jobs():
+        sections = stream_client_sections(excel_file_path, sheet_name)
+        for index in itertools.count():
+            # Reading rows and discovering clients are interleaved in streaming mode
+            with profiling.phase("workbook stream + discovery"):
+                section = next(sections, None)
+            if section is None or index >= end_index:
+                return
+            client_row, client_name, search_end, next_client_row, window = section
+            if index < start_from:
+                continue
+            header = (f"\n[{index - start_from + 1}] Processing: {client_name} (row {client_row})\n"
+                      f"  Search range: rows {client_row+1} to {search_end}" + (f" (next client at {next_client_row})" if next_client_row else ""))
+            yield window, client_row, client_name, search_end, header
+    
+    for client_name, client_data in extract_sections(jobs(), workers, cache, metrics):
+        processed_count += 1
         clients_data["clients"][client_name] = client_data
-        
-        extra_count = len(extra_data) if extra_data else 0
-        print(f"  Summary: Previous={previous_completed}, Current={paid_used} used + {remaining} remaining + {len(enhanced_unpaid)} unpaid = {total_current}, Total={total_all_time}" + (f", {extra_count} with extra text" if extra_count > 0 else ""))
     
+    resolve_client_dates(clients_data["clients"])
+    if cache is not None:
+        clients_data["cache"] = cache.summary()
+    logger.info("Streamed %d clients starting from position %d", processed_count, start_from+1)
     return clients_data
 
-def save_to_json(data, output_file="sessions_extracted.json"):
-    """Save the extracted data to a JSON file optimized for Next.js frontend."""
-    
-    # Transform data structure for better frontend usability
-    clients_array = []
+def expand_workbook_paths(patterns):
+    """Expand directories and glob patterns into a sorted list of workbooks, skipping Excel lock files."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, "*.xlsx"))
+        else:
+            candidates = glob.glob(pattern)
+        for path in sorted(candidates):
+            if os.path.basename(path).startswith("~$") or path in paths:
+                continue
+            paths.append(path)
+    return paths
+
+def _extract_sheet_job(job):
+    """Process-pool entry point: stream-extract one sheet, capturing its console output and metrics."""
+    workbook_path, sheet_name, use_cache = job
+    cache = SectionCache.for_sheet(workbook_path, sheet_name) if use_cache else None
+    metrics = ExtractionMetrics()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        logger.info("\n📘 %s [%s]", workbook_path, sheet_name)
+        sheet_data = extract_client_sessions_streaming(workbook_path, sheet_name=sheet_name, cache=cache, metrics=metrics)
+    if cache is not None:
+        cache.save()
+    return sheet_data, log.getvalue(), metrics
+
+def extract_batch(patterns, workers=1, sheet_patterns=None, use_cache=False, metrics=None):
+    """
+    Extract every sheet of every workbook matched by ``patterns`` (directories or globs).
+
+    ``sheet_patterns`` optionally restricts the sheets to those whose name
+    matches one of the given fnmatch patterns (e.g. ``["Prezen*"]``).
+
+    Sheets are extracted concurrently in a pool of ``workers`` processes, each
+    in streaming mode so a job only parses its own sheet. Results are merged in
+    (workbook, sheet) order into one clients_data structure; every client is
+    tagged with its ``source`` workbook and sheet and keyed by
+    ``"workbook/sheet/name"`` so equal names from different trainers don't collide.
+    With ``use_cache`` each sheet keeps its own SectionCache. Per-sheet
+    metrics are merged into ``metrics`` if given.
+    """
+    global processed_count
+    jobs = []
+    for workbook_path in expand_workbook_paths(patterns):
+        wb = openpyxl.load_workbook(workbook_path, read_only=True)
+        for sheet_name in wb.sheetnames:
+            if not sheet_patterns or any(fnmatch.fnmatch(sheet_name, pattern) for pattern in sheet_patterns):
+                jobs.append((workbook_path, sheet_name, use_cache))
+        wb.close()
+    logger.info("Batch: %d sheets to extract with %d worker(s)", len(jobs), workers)
     
-    for client_name, client_data in data['clients'].items():
-        # Create slug-style ID from name
-        client_id = client_name.lower().replace(' ', '-').replace('ă', 'a').replace('â', 'a').replace('î', 'i').replace('ș', 's').replace('ț', 't')
-        
-        # Transform sessions to structured format
-        paid_sessions = []
-        unpaid_sessions = []
-        
-        # Handle both list and string formats
-        if isinstance(client_data.get('paid'), list):
-            for date_str in client_data['paid']:
-                if date_str.strip():  # Skip empty dates
-                    # Convert DD.MM.YYYY to YYYY-MM-DD for JavaScript Date compatibility
-                    try:
-                        parts = date_str.split('.')
-                        if len(parts) == 3:
-                            iso_date = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-                            paid_sessions.append({
-                                "date": iso_date,
-                                "formatted": date_str
-                            })
-                    except:
-                        # Fallback for malformed dates
-                        paid_sessions.append({
-                            "date": date_str,
-                            "formatted": date_str
-                        })
-        elif isinstance(client_data.get('paid'), str) and client_data['paid'].strip():
-            # Handle comma-separated string format
-            for date_str in client_data['paid'].split(', '):
-                if date_str.strip():
-                    try:
-                        parts = date_str.split('.')
-                        if len(parts) == 3:
-                            iso_date = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-                            paid_sessions.append({
-                                "date": iso_date,
-                                "formatted": date_str
-                            })
-                    except:
-                        paid_sessions.append({
-                            "date": date_str,
-                            "formatted": date_str
-                        })
-        
-        # Same logic for unpaid sessions
-        if isinstance(client_data.get('unpaid'), list):
-            for date_str in client_data['unpaid']:
-                if date_str.strip():
-                    try:
-                        parts = date_str.split('.')
-                        if len(parts) == 3:
-                            iso_date = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-                            unpaid_sessions.append({
-                                "date": iso_date,
-                                "formatted": date_str
-                            })
-                    except:
-                        unpaid_sessions.append({
-                            "date": date_str,
-                            "formatted": date_str
-                        })
-        elif isinstance(client_data.get('unpaid'), str) and client_data['unpaid'].strip():
-            for date_str in client_data['unpaid'].split(', '):
-                if date_str.strip():
-                    try:
-                        parts = date_str.split('.')
-                        if len(parts) == 3:
-                            iso_date = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-                            unpaid_sessions.append({
-                                "date": iso_date,
-                                "formatted": date_str
-                            })
-                    except:
-                        unpaid_sessions.append({
-                            "date": date_str,
-                            "formatted": date_str
-                        })
-        
-        # Clean up stats - use camelCase and remove legacy fields
-        stats = client_data.get('stats', {})
-        clean_stats = {
-            "previousCompleted": stats.get('previous_completed', 0),
-            "currentPaidUsed": stats.get('current_paid_used', 0),
-            "currentRemaining": stats.get('current_remaining', 0),
-            "currentUnpaid": stats.get('current_unpaid', 0),
-            "totalCurrent": stats.get('total_current', 0),
-            "totalAllTime": stats.get('total_all_time', 0)
-        }
-        
-        # Build client object
-        client_obj = {
-            "id": client_id,
-            "name": client_name,
-            "sessions": {
-                "paid": paid_sessions,
-                "unpaid": unpaid_sessions
-            },
-            "stats": clean_stats,
-            "lastUpdated": data.get('updated', datetime.now().strftime("%Y-%m-%d"))
-        }
-        
-        # Add extra data if present
-        if 'extra' in client_data:
-            client_obj['extra'] = client_data['extra']
+    merged = new_clients_data()
+    merged["sources"] = []
+    if use_cache:
+        merged["cache"] = {"reused": 0, "recomputed": 0}
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers, initializer=configure_logging, initargs=(logger.level,)))
+            results = executor.map(_extract_sheet_job, jobs)
+        else:
+            results = map(_extract_sheet_job, jobs)
         
-        clients_array.append(client_obj)
+        for (workbook_path, sheet_name, _), (sheet_data, log, sheet_metrics) in zip(jobs, results):
+            print(log, end="")
+            if metrics is not None:
+                metrics.merge(sheet_metrics)
+            for key, count in sheet_data.get("cache", {}).items():
+                merged["cache"][key] += count
+            source = {"workbook": os.path.basename(workbook_path), "sheet": sheet_name}
+            for client_name, client_data in sheet_data["clients"].items():
+                client_data.source = source
+                merged["clients"][f"{source['workbook']}/{sheet_name}/{client_name}"] = client_data
+            merged["sources"].append({**source, "clients": len(sheet_data["clients"])})
     
-    # Create frontend-optimized structure
-    frontend_data = {
-        "clients": clients_array,
-        "metadata": {
-            "totalClients": len(clients_array),
-            "generatedAt": datetime.now().isoformat() + "Z",
-            "version": "1.0",
-            "dateEnhancement": data.get('date_enhancement', {})
-        }
+    processed_count = len(merged["clients"])
+    return merged
+
+def verify_ooxml_backend(excel_file_path=EXCEL_FILE_PATH, sheet_name=None):
+    """Extract with both grid backends and report whether the results match client for client."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = extract_client_sessions(excel_file_path, sheet_name=sheet_name)
+        actual = extract_client_sessions(excel_file_path, sheet_name=sheet_name, backend="ooxml")
+    mismatched = [name for name in expected["clients"] if expected["clients"][name] != actual["clients"].get(name)]
+    mismatched += [name for name in actual["clients"] if name not in expected["clients"]]
+    print(f"openpyxl: {len(expected['clients'])} clients, ooxml: {len(actual['clients'])} clients")
+    for name in mismatched[:10]:
+        print(f"  ✗ {name}")
+    return not mismatched and list(expected["clients"]) == list(actual["clients"])
+
+def _slugify(text):
+    return text.lower().replace(' ', '-').replace('ă', 'a').replace('â', 'a').replace('î', 'i').replace('ș', 's').replace('ț', 't')
+
+def _api_sessions(sessions, iso_sessions=False):
+    """
+    Frontend session list: ``{"date": "YYYY-MM-DD", "formatted": "DD.MM.YYYY"}``
+    objects, or just the ISO strings with ``iso_sessions``.
+
+    For legacy client dicts: "DD.MM.YYYY" lists and comma-separated strings
+    (ClientRecords serialize themselves, see ClientRecord.to_api).
+    """
+    api_sessions = []
+    # Handle both list and string formats
+    if isinstance(sessions, list):
+        date_strings = sessions
+    elif isinstance(sessions, str) and sessions.strip():
+        date_strings = sessions.split(', ')
+    else:
+        date_strings = []
+    for date_str in date_strings:
+        if date_str.strip():  # Skip empty dates
+            # Convert DD.MM.YYYY to YYYY-MM-DD for JavaScript Date compatibility
+            try:
+                parts = date_str.split('.')
+                if len(parts) == 3:
+                    iso_date = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
+                    api_sessions.append(iso_date if iso_sessions else {"date": iso_date, "formatted": date_str})
+            except:
+                # Fallback for malformed dates
+                api_sessions.append(date_str if iso_sessions else {"date": date_str, "formatted": date_str})
+    return api_sessions
+
+def _client_id(client_key, client_data):
+    """Slug-style client ID from the name (prefixed with workbook and sheet for batch output)."""
+    is_record = isinstance(client_data, ClientRecord)
+    client_name = (client_data.name if is_record else client_data.get('name')) or client_key
+    client_id = _slugify(client_name)
+    source = client_data.source if is_record else client_data.get('source')
+    if source:
+        client_id = f"{_slugify(os.path.splitext(source['workbook'])[0])}--{_slugify(source['sheet'])}--{client_id}"
+    return client_id
+
+def _client_api_object(client_key, client_data, last_updated, iso_sessions=False):
+    """One client of fitness_sessions_api.json, from a ClientRecord or a legacy client dict."""
+    client_id = _client_id(client_key, client_data)
+    if isinstance(client_data, ClientRecord):
+        return client_data.to_api(client_id, last_updated, iso_sessions)
+    client_name = client_data.get('name') or client_key
+    source = client_data.get('source')
+    
+    # Clean up stats - use camelCase and remove legacy fields
+    stats = client_data.get('stats', {})
+    clean_stats = {
+        "previousCompleted": stats.get('previous_completed', 0),
+        "currentPaidUsed": stats.get('current_paid_used', 0),
+        "currentRemaining": stats.get('current_remaining', 0),
+        "currentUnpaid": stats.get('current_unpaid', 0),
+        "totalCurrent": stats.get('total_current', 0),
+        "totalAllTime": stats.get('total_all_time', 0)
     }
+    
+    # Build client object
+    client_obj = {
+        "id": client_id,
+        "name": client_name,
+        "sessions": {
+            "paid": _api_sessions(client_data.get('paid'), iso_sessions),
+            "unpaid": _api_sessions(client_data.get('unpaid'), iso_sessions)
+        },
+        "stats": clean_stats,
+        "lastUpdated": last_updated
+    }
+    
+    # Add extra data if present
+    if 'extra' in client_data:
+        client_obj['extra'] = client_data['extra']
+    
+    if source:
+        client_obj['source'] = source
+    return client_obj
+
+def _json_encoder(compact):
+    """Return a function encoding one value to UTF-8 JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        return lambda value: orjson.dumps(value, option=option)
+    if compact:
+        return lambda value: json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return lambda value: json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+
+def save_to_json(data, output_file="sessions_extracted.json", compact=False, iso_sessions=False, sessions_store=True):
+    """
+    Save the extracted data to a JSON file optimized for Next.js frontend.
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(frontend_data, f, indent=2, ensure_ascii=False)
+    Clients are converted and written one at a time, so the writer never holds
+    more than one client's output. ``compact`` drops the indentation and
+    ``iso_sessions`` writes each session as a plain "YYYY-MM-DD" string
+    instead of a {date, formatted} object (recorded as
+    ``metadata.sessionFormat``). orjson is used for encoding when installed.
+
+    With ``sessions_store`` the same clients are also written as a columnar
+    sessions store next to the JSON (see session_model.save_sessions_store),
+    which fitness_stats.py prefers when it is up to date.
+
+    Returns the file's metadata.
+    """
+    encode = _json_encoder(compact)
+    # Indented output nests clients two levels deep and metadata one level deep
+    newline, client_indent, field_indent = (b"", b"", b"") if compact else (b"\n", b"    ", b"  ")
+    separator = b":" if compact else b": "
+    last_updated = data.get('updated', datetime.now().strftime("%Y-%m-%d"))
+    total_clients = 0
+    # (client id, record, lastUpdated) for the sessions store - ClientRecords only
+    store_clients = [] if sessions_store and all(isinstance(client, ClientRecord) for client in data['clients'].values()) else None
+    
+    # Written next to the target and renamed over it, so readers never see a partial file
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        with profiling.phase("JSON write"):
+            f.write(b"{" + newline + field_indent + b'"clients"' + separator + b"[")
+            for client_key, client_data in data['clients'].items():
+                client_obj = _client_api_object(client_key, client_data, last_updated, iso_sessions)
+                if store_clients is not None:
+                    store_clients.append((client_obj["id"], client_data, last_updated))
+                encoded = encode(client_obj)
+                f.write((b"," if total_clients else b"") + newline + client_indent + encoded.replace(b"\n", b"\n" + client_indent))
+                total_clients += 1
+            if total_clients:
+                f.write(newline + field_indent)
+            
+            # Create frontend-optimized structure
+            metadata = {
+                "totalClients": total_clients,
+                "generatedAt": datetime.now().isoformat() + "Z",
+                "version": "1.0",
+                "dateEnhancement": data.get('date_enhancement', {})
+            }
+            if 'sources' in data:
+                metadata['sources'] = data['sources']
+            if iso_sessions:
+                metadata['sessionFormat'] = "iso"
+            f.write(b"]," + newline + field_indent + b'"metadata"' + separator
+                    + encode(metadata).replace(b"\n", b"\n" + field_indent) + newline + b"}")
+    os.replace(tmp_file, output_file)
     print(f"\nData saved to {output_file}")
+    
+    if store_clients is not None:
+        store_file = sessions_store_path(output_file)
+        with profiling.phase("sessions store write"):
+            metadata.pop('sessionFormat', None)  # The store has a single session layout
+            save_sessions_store(store_file, store_clients, metadata)
+        print(f"Sessions store saved to {store_file}")
+    return metadata
+
+def _session_delta(old_ordinals, new_ordinals):
+    """{"added": [...], "removed": [...]} ISO dates between two session lists (as multisets), or None if equal."""
+    old_counts = Counter(ordinal for ordinal in old_ordinals if ordinal)
+    new_counts = Counter(ordinal for ordinal in new_ordinals if ordinal)
+    if old_counts == new_counts:
+        return None
+    return {
+        "added": [session_date_strings(ordinal)[0] for ordinal in sorted((new_counts - old_counts).elements())],
+        "removed": [session_date_strings(ordinal)[0] for ordinal in sorted((old_counts - new_counts).elements())],
+    }
+
+def client_delta(client_id, old, new):
+    """
+    Changefeed entry for one client between two runs (``old`` / ``new`` are
+    ClientRecords, either may be None for an added / removed client), or None
+    if nothing the API exposes changed.
+    """
+    empty = ClientRecord(None, array("i"), array("i"))
+    before, after = old or empty, new or empty
+    entry = {"id": client_id, "name": after.name if new is not None else before.name,
+             "change": "added" if old is None else "removed" if new is None else "updated"}
+    
+    sessions = {}
+    for kind in ("paid", "unpaid"):
+        delta = _session_delta(getattr(before, kind), getattr(after, kind))
+        if delta is not None:
+            sessions[kind] = delta
+    if sessions:
+        entry["sessions"] = sessions
+    
+    old_stats = before.api_stats() if old is not None else {}
+    new_stats = after.api_stats() if new is not None else {}
+    stats = {field: {"from": old_stats.get(field), "to": new_stats.get(field)}
+             for field in (new_stats or old_stats) if old_stats.get(field) != new_stats.get(field)}
+    if stats:
+        entry["stats"] = stats
+    if before.extra != after.extra:
+        entry["extra"] = {"from": before.extra, "to": after.extra}
+    if old is not None and new is not None and before.name != after.name:
+        entry["previousName"] = before.name
+    
+    if entry["change"] == "updated" and len(entry) == 3:
+        return None
+    return entry
+
+def append_changefeed(data, feed_file=OUTPUT_FILE_CHANGEFEED, previous_output=OUTPUT_FILE_API):
+    """
+    Diff ``data`` against the previous run's output (``previous_output``, via
+    its sessions store when fresh) by client id - with _records_by_id's
+    ``#n`` suffix for repeats - and append the result to the JSONL
+    ``feed_file``: one run header, then one line per added, removed or
+    updated client with its added / removed session dates and changed stats
+    fields. Call it before save_to_json overwrites ``previous_output``.
+
+    Without a previous output the run is a baseline and every client is
+    "added", so replaying the feed from the start rebuilds the dataset.
+    """
+    try:
+        previous_metadata, previous_records, _ = load_api_records(previous_output)
+    except FileNotFoundError:
+        previous_metadata, previous_records = None, []
+    # Keyed as in _records_by_id, so clients sharing an id ("ana-maria-pop", "ana-maria-pop#2") stay apart
+    previous = _records_by_id({'clients': dict(enumerate(previous_records))})
+    current = _records_by_id(data)
+    
+    run = datetime.now().isoformat() + "Z"
+    entries = []
+    for client_id, record in current.items():
+        entry = client_delta(client_id, previous.get(client_id), record)
+        if entry is not None:
+            entries.append(entry)
+    for client_id, record in previous.items():
+        if client_id not in current:
+            entries.append(client_delta(client_id, record, None))
+    
+    changes = Counter(entry["change"] for entry in entries)
+    header = {
+        "type": "run",
+        "run": run,
+        "baseline": previous_metadata is None,
+        "previousGeneratedAt": previous_metadata.get("generatedAt") if previous_metadata else None,
+        "clients": len(current),
+        "added": changes["added"],
+        "removed": changes["removed"],
+        "updated": changes["updated"],
+        "unchanged": len(current) - changes["added"] - changes["updated"],
+    }
+    lines = [json.dumps(header, ensure_ascii=False)]
+    lines += [json.dumps({"type": "client", "run": run, **entry}, ensure_ascii=False) for entry in entries]
+    # One append per run, so a reader never sees a header without its entries
+    with open(feed_file, 'a', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"Changefeed: {changes['added']} added, {changes['removed']} removed, {changes['updated']} updated -> {feed_file}")
+    return header
+
+SQLITE_SCHEMA = """
+CREATE TABLE clients (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    last_updated TEXT,
+    extra TEXT,  -- JSON, as in the API output
+    source_workbook TEXT,
+    source_sheet TEXT
+);
+CREATE TABLE sessions (
+    id INTEGER PRIMARY KEY,
+    client_id INTEGER NOT NULL REFERENCES clients(id),
+    session_date TEXT NOT NULL,
+    paid INTEGER NOT NULL CHECK (paid IN (0, 1))
+);
+CREATE TABLE client_stats (
+    client_id INTEGER PRIMARY KEY REFERENCES clients(id),
+    previous_completed INTEGER NOT NULL,
+    current_paid_used INTEGER NOT NULL,
+    current_remaining INTEGER NOT NULL,
+    current_unpaid INTEGER NOT NULL,
+    total_current INTEGER NOT NULL,
+    total_all_time INTEGER NOT NULL
+);
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Created after the bulk load (clients.slug is already indexed by its UNIQUE constraint)
+SQLITE_INDEXES = """
+CREATE INDEX idx_sessions_client_date ON sessions(client_id, session_date);
+CREATE INDEX idx_sessions_date ON sessions(session_date);
+CREATE INDEX idx_sessions_paid_date ON sessions(paid, session_date);
+CREATE INDEX idx_client_stats_total_all_time ON client_stats(total_all_time);
+CREATE INDEX idx_client_stats_current_unpaid ON client_stats(current_unpaid);
+CREATE INDEX idx_client_stats_current_remaining ON client_stats(current_remaining);
+"""
+
+def save_to_sqlite(data, output_file=OUTPUT_FILE_SQLITE):
+    """
+    Export the extracted data to an indexed SQLite database.
+
+    ``clients`` (slug - the API client id, with a ``#n`` suffix when it
+    repeats, see _records_by_id - name, extra, source), ``sessions`` (one
+    row per dated session, ISO date and paid flag) and ``client_stats`` (the
+    API stats) cover the query patterns in FITNESS_SESSIONS_API_DOCS.md:
+    lookups by slug, filtering by payment status, sorting by activity and
+    date-range timelines. The database is built in a temporary file inside one
+    transaction, indexed after the load, and then moved into place.
+    """
+    last_updated = data.get('updated', datetime.now().strftime("%Y-%m-%d"))
+    tmp_file = output_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    
+    clients, sessions, stats = [], [], []
+    # Names can share a slug ("Ana-Maria Pop" / "Ana Maria Pop"); repeats get a "#n" suffix
+    for row_id, (slug, client_data) in enumerate(_records_by_id(data).items(), 1):
+        source = client_data.source or {}
+        clients.append((row_id, slug, client_data.name, last_updated,
+                        json.dumps(client_data.extra, ensure_ascii=False) if client_data.extra is not None else None,
+                        source.get('workbook'), source.get('sheet')))
+        for paid, ordinals in ((1, client_data.paid), (0, client_data.unpaid)):
+            sessions.extend((row_id, session_date_strings(ordinal)[0], paid) for ordinal in ordinals if ordinal)
+        api_stats = client_data.api_stats()
+        stats.append((row_id, api_stats["previousCompleted"], api_stats["currentPaidUsed"], api_stats["currentRemaining"],
+                      api_stats["currentUnpaid"], api_stats["totalCurrent"], api_stats["totalAllTime"]))
+    metadata = {
+        "totalClients": len(clients),
+        "generatedAt": datetime.now().isoformat() + "Z",
+        "version": "1.0",
+        "dateEnhancement": json.dumps(data.get('date_enhancement', {}), ensure_ascii=False),
+    }
+    if 'sources' in data:
+        metadata['sources'] = json.dumps(data['sources'], ensure_ascii=False)
+    
+    conn = sqlite3.connect(tmp_file, isolation_level=None)
+    try:
+        # Nothing to recover if the build fails half-way - the file is discarded
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        # executescript() would commit first, so the DDL runs statement by statement
+        for statement in SQLITE_SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        conn.executemany("INSERT INTO clients VALUES (?, ?, ?, ?, ?, ?, ?)", clients)
+        conn.executemany("INSERT INTO sessions (client_id, session_date, paid) VALUES (?, ?, ?)", sessions)
+        conn.executemany("INSERT INTO client_stats VALUES (?, ?, ?, ?, ?, ?, ?)", stats)
+        conn.executemany("INSERT INTO metadata VALUES (?, ?)", [(key, str(value)) for key, value in metadata.items()])
+        for statement in SQLITE_INDEXES.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+    except Exception:
+        conn.close()
+        os.remove(tmp_file)
+        raise
+    conn.close()
+    os.replace(tmp_file, output_file)
+    print(f"SQLite database saved to {output_file} ({len(clients)} clients, {len(sessions)} sessions)")
+
+class WarmExtractor:
+    """
+    Extraction state --watch keeps in memory between refreshes: the workbook's
+    content hash, its SheetGrid and SectionIndex, and a SectionCache.
+
+    ``refresh()`` does nothing when the workbook's contents are unchanged
+    (Excel often re-saves an identical file). Otherwise it re-parses the sheet,
+    re-indexes only the rows from the first changed one down (see
+    update_section_index) and re-scans only the sections whose fingerprint
+    changed.
+    """
+
+    def __init__(self, excel_file_path=EXCEL_FILE_PATH, sheet_name=None, backend="openpyxl", workers=1, use_cache=True):
+        self.excel_file_path = excel_file_path
+        self.sheet_name = sheet_name
+        self.backend = backend
+        self.workers = workers
+        self.cache = SectionCache.for_sheet(excel_file_path, sheet_name) if use_cache else None
+        self.digest = None
+        self.grid = None
+        self.index = None
+
+    def refresh(self, metrics=None):
+        """Re-extract the workbook; returns the clients data, or None if its contents are unchanged."""
+        digest = _grid_cache_key(self.excel_file_path, self.sheet_name, self.backend)
+        if digest == self.digest:
+            return None
+        with profiling.phase("workbook load"):
+            grid = load_sheet_grid(self.excel_file_path, self.sheet_name, backend=self.backend)
+        with profiling.phase("client discovery"):
+            index = update_section_index(self.index, self.grid, grid)
+        if self.cache is not None:
+            self.cache.start_run()
+        clients_data = extract_grid_sessions(grid, index, workers=self.workers, cache=self.cache, metrics=metrics)
+        if self.cache is not None:
+            self.cache.save()
+        # Only commit the new state once the whole refresh went through
+        self.digest, self.grid, self.index = digest, grid, index
+        return clients_data
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None  # Mid-save: Excel renames the old file away before moving the new one in
+    return stat.st_mtime_ns, stat.st_size
+
+def _records_by_id(data):
+    """
+    ``{client id: ClientRecord}`` for extracted ``data``, in order. Legacy
+    client dicts go through the JSON form, exactly as the dashboard would
+    read them; an id that repeats gets a ``#n`` suffix.
+    """
+    records = {}
+    for client_key, client_data in data['clients'].items():
+        record = client_data if isinstance(client_data, ClientRecord) else ClientRecord.from_api(_client_api_object(client_key, client_data, None))
+        client_id = base_id = _client_id(client_key, client_data)
+        suffix = 1
+        while client_id in records:
+            suffix += 1
+            client_id = f"{base_id}#{suffix}"
+        records[client_id] = record
+    return records
+
+def apply_extraction_changes(state, previous, current):
+    """
+    Apply the per-client differences between two extractions (``{client id:
+    ClientRecord}``) to a fitness_stats.AggregateState, as changefeed entries
+    (see client_delta). Returns the number of clients that changed.
+    """
+    changed = 0
+    for client_id, record in current.items():
+        old = previous.get(client_id)
+        entry = client_delta(client_id, old, record) if old is not record else None
+        if entry is not None:
+            state.apply_change(entry)
+            changed += 1
+    for client_id in previous.keys() - current.keys():
+        state.apply_change(client_delta(client_id, previous[client_id], None))
+        changed += 1
+    return changed
+
+def update_aggregate_state(data, output_file=OUTPUT_FILE_API):
+    """
+    fitness_stats' AggregateState for ``data``. The state persisted next to
+    ``output_file`` is brought up to date with the per-client changes since
+    the run that wrote ``output_file`` when it matches that run; otherwise
+    (first run, or the JSON was written without it) it is built from scratch.
+    Call it before save_to_json overwrites ``output_file``; save_rollup
+    persists the result.
+    """
+    import fitness_stats  # Aggregation needs numpy only; rich is imported by the dashboard output
+    current = _records_by_id(data)
+    state = fitness_stats.AggregateState.load(fitness_stats.state_path(output_file))
+    if state is not None:
+        try:
+            previous_metadata, previous_records, _ = load_api_records(output_file)
+        except (FileNotFoundError, ValueError):
+            previous_metadata = None
+        if previous_metadata is not None and previous_metadata.get('generatedAt') == state.stamp:
+            previous = _records_by_id({'clients': {index: record for index, record in enumerate(previous_records)}})
+            changed = apply_extraction_changes(state, previous, current)
+            logger.info("Aggregate state: %d of %d clients changed since the previous run", changed, len(current))
+            return state
+    logger.info("Aggregate state: built from all %d clients", len(current))
+    return fitness_stats.AggregateState.from_records(current.items())
+
+def save_rollup(data, metadata, workbooks, output_file=OUTPUT_FILE_API, state=None):
+    """
+    Write fitness_stats.py's aggregates for ``data`` next to ``output_file``
+    (see fitness_stats.export_rollup), stamped with the hash of ``workbooks``
+    and the ``generatedAt`` of the ``metadata`` save_to_json returned. The
+    dashboard then reads the figures instead of recomputing them.
+
+    With ``state`` (see update_aggregate_state) the figures come from it and
+    it is persisted next to ``output_file`` for the next run.
+    """
+    import fitness_stats  # Aggregation needs numpy only; rich is imported by the dashboard output
+    rollup_file = fitness_stats.rollup_path(output_file)
+    if state is not None:
+        aggregates = state.aggregates()
+        state.save(fitness_stats.state_path(output_file), metadata['generatedAt'])
+    else:
+        aggregates = fitness_stats.aggregate_clients(_records_by_id(data).values())
+    fitness_stats.export_rollup(aggregates, rollup_file, workbooks, metadata['generatedAt'])
+    print(f"Rollup saved to {rollup_file}")
+
+def save_stats_summary(data, output_file=OUTPUT_FILE_STATS):
+    """Write fitness_stats.py's overview summary for freshly extracted ``data`` (without re-reading the JSON)."""
+    import fitness_stats  # export_stats_summary prints with rich, so only watch mode needs it
+    fitness_stats.export_stats_summary(fitness_stats.get_overview_stats({"clients": list(data["clients"].values())}), output_file)
+
+def watch_workbook(args, excel_file_path=EXCEL_FILE_PATH, poll_seconds=WATCH_POLL_SECONDS, debounce_seconds=WATCH_DEBOUNCE_SECONDS):
+    """
+    Re-extract whenever ``excel_file_path`` changes, until interrupted.
+
+    Only the workbook itself is polled, so Excel's lock file (``~$excel.xlsx``)
+    and the temporary files it writes while saving never trigger a run. A
+    change is acted on once the file has stayed the same for
+    ``debounce_seconds``; a refresh that fails (e.g. the file is still being
+    written, or an output can't be written) is retried on the next change and
+    the watch keeps polling. Each refresh atomically replaces
+    OUTPUT_FILE_API (plus its sessions store) and OUTPUT_FILE_STATS.
+    """
+    extractor = WarmExtractor(excel_file_path, backend=args.backend, workers=args.workers, use_cache=args.use_cache)
+    aggregate_state, previous_records = None, None  # Kept between refreshes so only changed clients are re-aggregated
+
+    def refresh():
+        nonlocal aggregate_state, previous_records
+        started = perf_counter()
+        try:
+            session_data = extractor.refresh()
+        except Exception as e:  # A half-written .xlsx fails in zipfile / openpyxl in many ways
+            print(f"⚠️  {datetime.now():%H:%M:%S} Could not read {excel_file_path} ({type(e).__name__}: {e}); waiting for the next save")
+            return
+        if session_data is None:
+            print(f"💤 {datetime.now():%H:%M:%S} {excel_file_path} saved without changes")
+            return
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                if args.changefeed:
+                    append_changefeed(session_data, args.changefeed)
+                if args.rollup:
+                    current_records = _records_by_id(session_data)
+                    if aggregate_state is None:
+                        aggregate_state = update_aggregate_state(session_data)
+                    else:
+                        apply_extraction_changes(aggregate_state, previous_records, current_records)
+                    previous_records = current_records
+                metadata = save_to_json(session_data, OUTPUT_FILE_API, compact=args.compact, iso_sessions=args.iso_sessions,
+                                        sessions_store=args.sessions_store)
+                if args.rollup:
+                    save_rollup(session_data, metadata, [excel_file_path], state=aggregate_state)
+                if args.sqlite:
+                    save_to_sqlite(session_data, args.sqlite)
+                save_stats_summary(session_data)
+        except Exception as e:  # Disk full, an output locked by another program, ...
+            # The aggregate state may be half-updated: rebuild it, and re-extract even an unchanged workbook
+            aggregate_state, previous_records = None, None
+            extractor.digest = None
+            print(f"⚠️  {datetime.now():%H:%M:%S} Could not write the outputs ({type(e).__name__}: {e}); retrying on the next save")
+            return
+        cache = session_data.get("cache", {})
+        reuse = f", {cache['reused']} sections reused, {cache['recomputed']} rescanned" if cache else ""
+        print(f"🔄 {datetime.now():%H:%M:%S} {len(session_data['clients'])} clients -> {OUTPUT_FILE_API}, "
+              f"{OUTPUT_FILE_STATS} in {perf_counter() - started:.2f}s{reuse}")
+
+    print(f"👀 Watching {excel_file_path} (Ctrl+C to stop)")
+    signature = _file_signature(excel_file_path)
+    refresh()
+    changed_at = None
+    while True:
+        sleep(poll_seconds)
+        current = _file_signature(excel_file_path)
+        if current != signature:
+            signature, changed_at = current, perf_counter()
+        elif changed_at is not None and current is not None and perf_counter() - changed_at >= debounce_seconds:
+            changed_at = None
+            refresh()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract client training sessions from the trainer workbook.")
+    parser.add_argument("--stream", action="store_true",
+                        help="read the sheet in read-only streaming mode with a bounded row window (flat memory use)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="extract client sections (or, with --batch, sheets) in parallel across N worker processes (default: 1)")
+    parser.add_argument("--batch", nargs="+", metavar="PATH",
+                        help="extract every sheet of every workbook in these directories / glob patterns into one merged output")
+    parser.add_argument("--backend", choices=sorted(GRID_BACKENDS), default="openpyxl",
+                        help="workbook parser for full (non-streaming) mode: openpyxl or the raw OOXML fast path")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help=f"re-parse the workbook and re-extract every client instead of reusing cached results (kept in {CACHE_DIR}/)")
+    parser.add_argument("--sheets", nargs="+", metavar="PATTERN",
+                        help="with --batch, only extract sheets whose name matches one of these patterns")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="log each client (-v) or every candidate and session cell (-vv); quiet by default")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write extraction metrics (cells scanned, date lookups, parse failures, per-client timings) to PATH")
+    parser.add_argument("--metrics-format", choices=["json", "prometheus"], default="json",
+                        help="format of the --metrics file (default: json)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write the JSON without indentation (streamed one client at a time either way)")
+    parser.add_argument("--iso-sessions", action="store_true",
+                        help="write each session as a plain YYYY-MM-DD string instead of a {date, formatted} object")
+    parser.add_argument("--no-sessions-store", dest="sessions_store", action="store_false",
+                        help="don't write the columnar .sessions file next to the JSON")
+    parser.add_argument("--no-rollup", dest="rollup", action="store_false",
+                        help="don't write the precomputed fitness_stats aggregates (or the aggregate state they are kept in) next to the JSON")
+    parser.add_argument("--sqlite", nargs="?", const=OUTPUT_FILE_SQLITE, metavar="PATH",
+                        help=f"also export clients, sessions and stats to an indexed SQLite database (default: {OUTPUT_FILE_SQLITE})")
+    parser.add_argument("--changefeed", nargs="?", const=OUTPUT_FILE_CHANGEFEED, metavar="PATH",
+                        help=f"append per-client deltas against the previous {OUTPUT_FILE_API} to a JSONL changefeed (default: {OUTPUT_FILE_CHANGEFEED})")
+    parser.add_argument("--watch", action="store_true",
+                        help=f"keep running and re-extract whenever {EXCEL_FILE_PATH} changes (also rewrites {OUTPUT_FILE_STATS})")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase and record its tracemalloc peak, then print a report table")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="with --profile, also record the run with cProfile and dump the stats to PATH")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    configure_logging([LOG_LEVEL, logging.INFO, logging.DEBUG][min(args.verbose, 2)])
+    if args.watch:
+        if args.batch or args.stream:
+            sys.exit("--watch works on the full-sheet extraction; it can't be combined with --batch or --stream")
+        try:
+            watch_workbook(args)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        sys.exit(0)
+    if args.profile:
+        profiling.PROFILER.start(cprofile_path=args.profile_out)
     try:
         print("Extracting session data for ALL clients...")
-        session_data = extract_client_sessions()
+        cache = SectionCache.for_sheet(EXCEL_FILE_PATH) if args.use_cache and not args.batch else None
+        metrics = ExtractionMetrics() if args.metrics else None
+        if args.batch:
+            session_data = extract_batch(args.batch, workers=args.workers, sheet_patterns=args.sheets, use_cache=args.use_cache, metrics=metrics)
+        elif args.stream:
+            session_data = extract_client_sessions_streaming(workers=args.workers, cache=cache, metrics=metrics)
+        else:
+            session_data = extract_client_sessions(workers=args.workers, cache=cache, use_grid_cache=args.use_cache, backend=args.backend, metrics=metrics)
+        if cache is not None:
+            cache.save()
+        if metrics is not None:
+            metrics.save(args.metrics, args.metrics_format)
+        
+        if args.changefeed:
+            with profiling.phase("changefeed"):
+                append_changefeed(session_data, args.changefeed)
+        
+        aggregate_state = None
+        if args.rollup:
+            with profiling.phase("aggregate state"):
+                aggregate_state = update_aggregate_state(session_data)
         
         # Save to JSON with enhanced dates  
-        save_to_json(session_data, OUTPUT_FILE_API)
+        with profiling.phase("save_to_json"):
+            metadata = save_to_json(session_data, OUTPUT_FILE_API, compact=args.compact, iso_sessions=args.iso_sessions,
+                                    sessions_store=args.sessions_store)
+        if args.rollup:
+            with profiling.phase("rollup"):
+                save_rollup(session_data, metadata, expand_workbook_paths(args.batch) if args.batch else [EXCEL_FILE_PATH],
+                            state=aggregate_state)
+        if args.sqlite:
+            with profiling.phase("SQLite export"):
+                save_to_sqlite(session_data, args.sqlite)
         
         # Print enhancement summary
         total_clients = len(session_data['clients'])
-        total_sessions = sum(info['stats']['total'] for info in session_data['clients'].values())
+        total_sessions = sum(info.total_current for info in session_data['clients'].values())
         year_2024_count = 0
         year_2025_count = 0
         
         for client_data in session_data['clients'].values():
-            for session in client_data.get('paid', []) + client_data.get('unpaid', []):
+            for session in client_data.paid + client_data.unpaid:
+                session = format_session_date(session)
                 if '2024' in session:
                     year_2024_count += 1
                 elif '2025' in session:
@@ -685,16 +2272,15 @@ if __name__ == "__main__":
         sample_count = 0
         clients_with_extra = 0
         for name, info in session_data['clients'].items():
-            if 'extra' in info:
+            if info.extra:
                 clients_with_extra += 1
             if sample_count >= 3:
                 continue
-            stats = info['stats']
-            if stats['total'] > 0:
-                paid_sample = info['paid'][:2] if info['paid'] else []
-                unpaid_sample = info['unpaid'][:1] if info['unpaid'] else []
-                extra_sample = info.get('extra', [])[:1] if info.get('extra') else []
-                print(f"  {name}: {stats['total']} sessions")
+            if info.total_current > 0:
+                paid_sample = [format_session_date(day) for day in info.paid[:2]]
+                unpaid_sample = [format_session_date(day) for day in info.unpaid[:1]]
+                extra_sample = info.extra[:1] if info.extra else []
+                print(f"  {name}: {info.total_current} sessions")
                 if paid_sample:
                     print(f"    Paid: {paid_sample}")
                 if unpaid_sample:
@@ -705,6 +2291,13 @@ if __name__ == "__main__":
         
         print(f"\n📝 Clients with extra text: {clients_with_extra}")
         print(f"🔢 Total clients processed: {processed_count}")
+        if 'cache' in session_data:
+            print(f"♻️  Reused from cache: {session_data['cache']['reused']}, recomputed: {session_data['cache']['recomputed']}")
+        if metrics is not None:
+            print(f"📈 Metrics written to {args.metrics}")
+        if args.profile:
+            profiling.PROFILER.stop()
+            print(profiling.PROFILER.report("EXTRACTION PROFILE"))
         
     except Exception as e:
         print(f"Error: {e}")
@@ -1,233 +1,508 @@
 # /// script
 # dependencies = [
+#   "numpy",
 #   "rich",
 # ]
 # ///
 
+import argparse
+import calendar
+import hashlib
 import json
+import os
 import sys
+from array import array
 from datetime import datetime, date
-from collections import defaultdict, Counter
+from bisect import bisect_left
+from heapq import heappush, heapreplace, nlargest
 from typing import Dict, List, Any, Tuple
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.columns import Columns
-from rich.text import Text
-from rich.progress import track
+import numpy as np
 
-console = Console()
+import profiling
+from session_model import iso_date_ordinal, load_api_records, stream_api_records
 
-def load_fitness_data(filename: str = "fitness_sessions_api.json") -> Dict[str, Any]:
-    """Load the fitness sessions data from JSON file."""
+_CONSOLE = None
+
+def _console():
+    """The rich Console the dashboard prints to. rich is imported on first use, so aggregation needs only numpy."""
+    global _CONSOLE
+    if _CONSOLE is None:
+        from rich.console import Console
+        _CONSOLE = Console()
+    return _CONSOLE
+
+DATA_FILE = "fitness_sessions_api.json"
+ROLLUP_VERSION = 1  # Layout of the rollup extract_sessions.py writes next to it (see export_rollup)
+
+def load_fitness_data(filename: str = DATA_FILE, stream: bool = False) -> Dict[str, Any]:
+    """
+    Load the fitness sessions data, with each client as a ClientRecord.
+
+    The columnar sessions store extract_sessions.py writes next to the JSON
+    is memory-mapped instead when it was written with the JSON (same
+    ``metadata.generatedAt``); ``data['store']`` then holds the SessionsStore.
+
+    With ``stream`` only the metadata is read up front and ``data['clients']``
+    is an iterator decoding one client at a time, for a single pass such as
+    aggregate_clients.
+    """
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        metadata, clients, store = (stream_api_records if stream else load_api_records)(filename)
     except FileNotFoundError:
+        console = _console()
         console.print(f"[red]Error: {filename} not found![/red]")
         console.print("[yellow]Make sure to run extract_sessions.py first to generate the data.[/yellow]")
         sys.exit(1)
     except json.JSONDecodeError:
-        console.print(f"[red]Error: Invalid JSON in {filename}![/red]")
+        _console().print(f"[red]Error: Invalid JSON in {filename}![/red]")
         sys.exit(1)
+    data = {'clients': clients, 'metadata': metadata}
+    if store is not None:
+        data['store'] = store
+    return data
 
-def parse_date(date_str: str) -> date:
-    """Parse ISO date string to date object."""
-    try:
-        return datetime.fromisoformat(date_str).date()
-    except:
-        return None
+# Ranking tables and histogram buckets (see aggregate_clients)
+AVG_SESSION_PRICE = 30  # Lei per session (configurable)
+TOP_K = 10              # Clients per ranking table
+SESSION_RANGES = [(0, '0 sessions'), (5, '1-5 sessions'), (10, '6-10 sessions'), (20, '11-20 sessions'),
+                  (50, '21-50 sessions'), (100, '51-100 sessions'), (None, '100+ sessions')]
+REMAINING_RANGES = [(0, '0 remaining'), (5, '1-5 remaining'), (10, '6-10 remaining'), (20, '11-20 remaining'),
+                    (None, '20+ remaining')]
 
-def get_overview_stats(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Calculate overview statistics."""
-    clients = data['clients']
-    total_clients = len(clients)
-    
-    # Basic counts
-    active_clients = len([c for c in clients if c['stats']['totalCurrent'] > 0])
-    clients_with_previous = len([c for c in clients if c['stats']['previousCompleted'] > 0])
-    clients_with_unpaid = len([c for c in clients if c['stats']['currentUnpaid'] > 0])
-    
-    # Session totals
-    total_sessions_current = sum(c['stats']['totalCurrent'] for c in clients)
-    total_sessions_all_time = sum(c['stats']['totalAllTime'] for c in clients)
-    total_previous_sessions = sum(c['stats']['previousCompleted'] for c in clients)
-    total_paid_used = sum(c['stats']['currentPaidUsed'] for c in clients)
-    total_remaining = sum(c['stats']['currentRemaining'] for c in clients)
-    total_unpaid = sum(c['stats']['currentUnpaid'] for c in clients)
-    
-    # Financial calculations (assuming average session price)
-    avg_session_price = 30  # Lei per session (configurable)
-    revenue_from_paid = total_paid_used * avg_session_price
-    potential_revenue_remaining = total_remaining * avg_session_price
-    outstanding_unpaid = total_unpaid * avg_session_price
-    
+def _bucket_bounds(ranges):
+    """Inclusive upper bounds of ``ranges`` for bisect_left (the open-ended last bucket has none)."""
+    return [bound for bound, _ in ranges if bound is not None]
+
+_SESSION_BOUNDS = _bucket_bounds(SESSION_RANGES)
+_REMAINING_BOUNDS = _bucket_bounds(REMAINING_RANGES)
+
+def _ranked(heap: List[Tuple[int, int, str]]) -> List[Tuple[str, int]]:
+    """A top-K heap as ``(name, value)`` pairs, highest first and earlier clients first on ties."""
+    return [(name, value) for value, _, name in sorted(heap, reverse=True)]
+
+def _payment_pattern(current: int, paid: int, unpaid: int):
+    """A client's payment pattern key (None for clients with only pre-paid remaining sessions)."""
+    if current == 0:
+        return 'no_sessions'
+    if unpaid == 0:
+        return 'only_paid' if paid > 0 else None
+    return 'only_unpaid' if paid == 0 else 'mixed_payment'
+
+def _overview(totals: Dict[str, int]) -> Dict[str, Any]:
+    """get_overview_stats' dict from the client counts and session sums in ``totals``."""
+    return {
+        'total_clients': totals['total_clients'],
+        'active_clients': totals['active_clients'],
+        'clients_with_previous': totals['clients_with_previous'],
+        'clients_with_unpaid': totals['clients_with_unpaid'],
+        'total_sessions_current': totals['total_sessions_current'],
+        'total_sessions_all_time': totals['total_previous_sessions'] + totals['total_sessions_current'],
+        'total_previous_sessions': totals['total_previous_sessions'],
+        'total_paid_used': totals['total_paid_used'],
+        'total_remaining': totals['total_remaining'],
+        'total_unpaid': totals['total_unpaid'],
+        'revenue_from_paid': totals['total_paid_used'] * AVG_SESSION_PRICE,
+        'potential_revenue_remaining': totals['total_remaining'] * AVG_SESSION_PRICE,
+        'outstanding_unpaid': totals['total_unpaid'] * AVG_SESSION_PRICE,
+        'avg_session_price': AVG_SESSION_PRICE
+    }
+
+def _patterns(session_buckets: List[int], payment_patterns: Dict[str, int], remaining_buckets: List[int]) -> Dict[str, Any]:
+    """get_session_patterns' dict from per-bucket client counts."""
     return {
+        'session_ranges': {label: count for (_, label), count in zip(SESSION_RANGES, session_buckets)},
+        'payment_patterns': dict(payment_patterns),
+        'remaining_ranges': {label: count for (_, label), count in zip(REMAINING_RANGES, remaining_buckets)}
+    }
+
+def aggregate_clients(clients, top_k: int = TOP_K) -> Dict[str, Any]:
+    """
+    Overview totals, client rankings, session patterns and date analytics in
+    one pass over the clients.
+
+    ``clients`` may be any iterable, such as load_fitness_data's stream: each
+    client is dropped once counted, only its session dates are kept (4 bytes
+    each, for the date analytics). Returns ``{'overview', 'rankings',
+    'patterns', 'dates'}`` holding the dicts get_overview_stats,
+    get_client_rankings, get_session_patterns and get_date_analytics return.
+    Each ranking is a min-heap of at most ``top_k`` ``(value, -index, name)``
+    entries, so ranking costs O(n log k) instead of a full sort per table and
+    matches a stable ``sorted(..., reverse=True)[:top_k]``: on equal values the
+    earlier client ranks first.
+    """
+    session_buckets = [0] * len(SESSION_RANGES)
+    remaining_buckets = [0] * len(REMAINING_RANGES)
+    payment_patterns = {'only_paid': 0, 'only_unpaid': 0, 'mixed_payment': 0, 'no_sessions': 0}
+
+    total_clients = active_clients = clients_with_previous = clients_with_unpaid = 0
+    total_sessions_current = total_previous_sessions = total_paid_used = total_remaining = total_unpaid = 0
+    top_all_time, top_current, top_previous, top_unpaid = [], [], [], []
+    ordinals = array('i')  # Paid then unpaid session dates, client by client
+
+    for index, client in enumerate(clients):
+        current = client.total_current
+        previous = client.previous_completed
+        paid = client.paid_used
+        unpaid = client.unpaid_count
+        remaining = client.remaining
+        all_time = previous + current
+        ordinals += client.paid
+        ordinals += client.unpaid
+
+        total_clients += 1
+        total_sessions_current += current
+        total_previous_sessions += previous
+        total_paid_used += paid
+        total_remaining += remaining
+        total_unpaid += unpaid
+        if current > 0:
+            active_clients += 1
+        if previous > 0:
+            clients_with_previous += 1
+
+        pattern = _payment_pattern(current, paid, unpaid)
+        if pattern is not None:
+            payment_patterns[pattern] += 1
+
+        session_buckets[bisect_left(_SESSION_BOUNDS, current)] += 1
+        remaining_buckets[bisect_left(_REMAINING_BOUNDS, remaining)] += 1
+
+        # Bounded top-K heaps: a later client only displaces a strictly smaller value
+        rank = -index
+        for heap, value in ((top_all_time, all_time), (top_current, current), (top_previous, previous)):
+            if len(heap) < top_k:
+                heappush(heap, (value, rank, client.name))
+            elif value > heap[0][0]:
+                heapreplace(heap, (value, rank, client.name))
+        if unpaid > 0:
+            clients_with_unpaid += 1
+            if len(top_unpaid) < top_k:
+                heappush(top_unpaid, (unpaid, rank, client.name))
+            elif unpaid > top_unpaid[0][0]:
+                heapreplace(top_unpaid, (unpaid, rank, client.name))
+
+    overview = _overview({
         'total_clients': total_clients,
         'active_clients': active_clients,
         'clients_with_previous': clients_with_previous,
         'clients_with_unpaid': clients_with_unpaid,
         'total_sessions_current': total_sessions_current,
-        'total_sessions_all_time': total_sessions_all_time,
         'total_previous_sessions': total_previous_sessions,
         'total_paid_used': total_paid_used,
         'total_remaining': total_remaining,
-        'total_unpaid': total_unpaid,
-        'revenue_from_paid': revenue_from_paid,
-        'potential_revenue_remaining': potential_revenue_remaining,
-        'outstanding_unpaid': outstanding_unpaid,
-        'avg_session_price': avg_session_price
+        'total_unpaid': total_unpaid
+    })
+    rankings = {
+        'top_all_time': _ranked(top_all_time),
+        'top_current': _ranked(top_current),
+        'top_previous': _ranked(top_previous),
+        'top_unpaid': _ranked(top_unpaid)
     }
+    patterns = _patterns(session_buckets, payment_patterns, remaining_buckets)
+    return {'overview': overview, 'rankings': rankings, 'patterns': patterns, 'dates': _date_analytics(ordinals)}
 
-def get_date_analytics(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Analyze session dates and patterns."""
-    all_sessions = []
-    monthly_counts = defaultdict(int)
-    daily_counts = defaultdict(int)
-    
-    for client in track(data['clients'], description="Analyzing dates..."):
-        # Paid sessions
-        for session in client['sessions']['paid']:
-            session_date = parse_date(session['date'])
-            if session_date:
-                all_sessions.append(session_date)
-                month_key = session_date.strftime('%Y-%m')
-                day_key = session_date.strftime('%A')
-                monthly_counts[month_key] += 1
-                daily_counts[day_key] += 1
-        
-        # Unpaid sessions
-        for session in client['sessions']['unpaid']:
-            session_date = parse_date(session['date'])
-            if session_date:
-                all_sessions.append(session_date)
-                month_key = session_date.strftime('%Y-%m')
-                day_key = session_date.strftime('%A')
-                monthly_counts[month_key] += 1
-                daily_counts[day_key] += 1
-    
-    # Sort dates
-    all_sessions.sort()
-    
-    # Find date range
-    first_session = all_sessions[0] if all_sessions else None
-    last_session = all_sessions[-1] if all_sessions else None
-    
-    # Most active periods
-    busiest_month = max(monthly_counts.items(), key=lambda x: x[1]) if monthly_counts else (None, 0)
-    busiest_day = max(daily_counts.items(), key=lambda x: x[1]) if daily_counts else (None, 0)
+def _aggregates(data: Dict[str, Any]) -> Dict[str, Any]:
+    """aggregate_clients for ``data``, computed once and kept in ``data['aggregates']``."""
+    aggregates = data.get('aggregates')
+    if aggregates is None:
+        aggregates = data['aggregates'] = aggregate_clients(data['clients'])
+    return aggregates
+
+def get_overview_stats(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Calculate overview statistics."""
+    return _aggregates(data)['overview']
+
+# date(1970, 1, 1).toordinal(): converts date ordinals to numpy day numbers
+_UNIX_EPOCH_ORDINAL = 719163
+
+def _counts_by_first_seen(codes: np.ndarray, label) -> Tuple[Dict[str, int], Tuple[str, int]]:
+    """
+    ``np.bincount`` of the non-negative ``codes`` as a ``{label(code): count}``
+    dict in order of first appearance, plus the ``(label, count)`` with the
+    highest count (the first-seen one on ties, as ``max()`` over the dict).
+    """
+    counts = np.bincount(codes)
+    present, first_seen = np.unique(codes, return_index=True)
+    present = present[np.argsort(first_seen)]
+    ordered = counts[present]
+    labels = [label(int(code)) for code in present]
+    busiest = int(np.argmax(ordered))
+    return dict(zip(labels, ordered.tolist())), (labels[busiest], int(ordered[busiest]))
+
+def _date_analytics(ordinals: array) -> Dict[str, Any]:
+    """
+    Date analytics over ``ordinals``, every session date as a day ordinal.
+
+    Month and weekday counts come from ``np.bincount``, the date range from
+    the array's min and max. Count dicts keep the order each month/weekday
+    first appears in (paid then unpaid sessions, client by client).
+    """
+    ordinals = np.frombuffer(ordinals, dtype=np.int32)
+    ordinals = ordinals[ordinals != 0]  # 0 marks a session whose date didn't resolve
+    
+    if not len(ordinals):
+        return {
+            'total_dated_sessions': 0,
+            'first_session': None,
+            'last_session': None,
+            'monthly_counts': {},
+            'daily_counts': {},
+            'busiest_month': (None, 0),
+            'busiest_day': (None, 0)
+        }
+    
+    # Months since 1970-01, offset to start at 0 for bincount
+    months = (ordinals - _UNIX_EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    first_month = int(months.min())
+    monthly_counts, busiest_month = _counts_by_first_seen(
+        months - first_month,
+        lambda code: date(1970 + (first_month + code) // 12, (first_month + code) % 12 + 1, 1).strftime('%Y-%m'))
+    # Weekdays, 0 = Monday (ordinal 1 is Monday 0001-01-01)
+    daily_counts, busiest_day = _counts_by_first_seen((ordinals - 1) % 7, lambda code: calendar.day_name[code])
     
     return {
-        'total_dated_sessions': len(all_sessions),
-        'first_session': first_session,
-        'last_session': last_session,
-        'monthly_counts': dict(monthly_counts),
-        'daily_counts': dict(daily_counts),
+        'total_dated_sessions': len(ordinals),
+        'first_session': date.fromordinal(int(ordinals.min())),
+        'last_session': date.fromordinal(int(ordinals.max())),
+        'monthly_counts': monthly_counts,
+        'daily_counts': daily_counts,
         'busiest_month': busiest_month,
         'busiest_day': busiest_day
     }
 
+def get_date_analytics(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze session dates and patterns."""
+    return _aggregates(data)['dates']
+
 def get_client_rankings(data: Dict[str, Any]) -> Dict[str, List[Tuple[str, int]]]:
     """Get client rankings by various metrics."""
-    clients = data['clients']
-    
-    # Sort by different metrics
-    by_total_sessions = sorted(clients, key=lambda c: c['stats']['totalAllTime'], reverse=True)[:10]
-    by_current_activity = sorted(clients, key=lambda c: c['stats']['totalCurrent'], reverse=True)[:10]
-    by_previous_sessions = sorted(clients, key=lambda c: c['stats']['previousCompleted'], reverse=True)[:10]
-    by_unpaid = sorted(clients, key=lambda c: c['stats']['currentUnpaid'], reverse=True)[:10]
-    
-    return {
-        'top_all_time': [(c['name'], c['stats']['totalAllTime']) for c in by_total_sessions],
-        'top_current': [(c['name'], c['stats']['totalCurrent']) for c in by_current_activity],
-        'top_previous': [(c['name'], c['stats']['previousCompleted']) for c in by_previous_sessions],
-        'top_unpaid': [(c['name'], c['stats']['currentUnpaid']) for c in by_unpaid if c['stats']['currentUnpaid'] > 0]
-    }
+    return _aggregates(data)['rankings']
 
 def get_session_patterns(data: Dict[str, Any]) -> Dict[str, Any]:
     """Analyze session patterns and distributions."""
-    clients = data['clients']
-    
-    # Session count distributions
-    session_ranges = {
-        '0 sessions': 0,
-        '1-5 sessions': 0,
-        '6-10 sessions': 0,
-        '11-20 sessions': 0,
-        '21-50 sessions': 0,
-        '51-100 sessions': 0,
-        '100+ sessions': 0
-    }
-    
-    # Payment patterns
-    payment_patterns = {
-        'only_paid': 0,
-        'only_unpaid': 0,
-        'mixed_payment': 0,
-        'no_sessions': 0
-    }
-    
-    # Remaining session distribution
-    remaining_ranges = {
-        '0 remaining': 0,
-        '1-5 remaining': 0,
-        '6-10 remaining': 0,
-        '11-20 remaining': 0,
-        '20+ remaining': 0
-    }
-    
-    for client in clients:
-        total = client['stats']['totalCurrent']
-        paid = client['stats']['currentPaidUsed']
-        unpaid = client['stats']['currentUnpaid']
-        remaining = client['stats']['currentRemaining']
-        
-        # Session count ranges
-        if total == 0:
-            session_ranges['0 sessions'] += 1
-        elif total <= 5:
-            session_ranges['1-5 sessions'] += 1
-        elif total <= 10:
-            session_ranges['6-10 sessions'] += 1
-        elif total <= 20:
-            session_ranges['11-20 sessions'] += 1
-        elif total <= 50:
-            session_ranges['21-50 sessions'] += 1
-        elif total <= 100:
-            session_ranges['51-100 sessions'] += 1
-        else:
-            session_ranges['100+ sessions'] += 1
-        
-        # Payment patterns
-        if total == 0:
-            payment_patterns['no_sessions'] += 1
-        elif paid > 0 and unpaid == 0:
-            payment_patterns['only_paid'] += 1
-        elif paid == 0 and unpaid > 0:
-            payment_patterns['only_unpaid'] += 1
-        elif paid > 0 and unpaid > 0:
-            payment_patterns['mixed_payment'] += 1
-        
-        # Remaining sessions
-        if remaining == 0:
-            remaining_ranges['0 remaining'] += 1
-        elif remaining <= 5:
-            remaining_ranges['1-5 remaining'] += 1
-        elif remaining <= 10:
-            remaining_ranges['6-10 remaining'] += 1
-        elif remaining <= 20:
-            remaining_ranges['11-20 remaining'] += 1
-        else:
-            remaining_ranges['20+ remaining'] += 1
-    
-    return {
-        'session_ranges': session_ranges,
-        'payment_patterns': payment_patterns,
-        'remaining_ranges': remaining_ranges
-    }
+    return _aggregates(data)['patterns']
+
+# Per-client values an AggregateState keeps: name, previous_completed, paid_used, remaining, unpaid_count, position
+_NAME, _PREVIOUS, _PAID, _REMAINING, _UNPAID, _POSITION = range(6)
+# Changefeed / API stats fields and the slot each one sets (the totals are derived)
+_STATE_FIELDS = {'previousCompleted': _PREVIOUS, 'currentPaidUsed': _PAID, 'currentRemaining': _REMAINING,
+                 'currentUnpaid': _UNPAID}
+# Ranking key of a client's values (None leaves the client out of the ranking)
+_RANKING_VALUES = {
+    'top_all_time': lambda values: values[_PREVIOUS] + values[_PAID] + values[_REMAINING] + values[_UNPAID],
+    'top_current': lambda values: values[_PAID] + values[_REMAINING] + values[_UNPAID],
+    'top_previous': lambda values: values[_PREVIOUS],
+    'top_unpaid': lambda values: values[_UNPAID] if values[_UNPAID] > 0 else None,
+}
+STATE_VERSION = 1
+
+class AggregateState:
+    """
+    The dashboard aggregates kept up to date from per-client changes.
+
+    Holds the overview sums and client counts, the per-bucket and payment
+    pattern client counts, session counts per day (from which the month and
+    weekday counters are maintained) and a small row of values per client
+    for the rankings. ``apply`` moves one client's contribution, so the cost
+    of an update follows the size of the change, not of the dataset. A
+    ranking is recomputed (O(n log k)) only when a change could reach its
+    top K.
+
+    Results match aggregate_clients over the same clients, except that ties
+    (between clients, or for the busiest month/day) go to whichever came
+    first in the state's own history rather than in the current JSON order.
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.stamp = None  # generatedAt of the JSON the state matches (see save)
+        self.clients = {}  # client id -> [name, previous, paid_used, remaining, unpaid, position]
+        self.next_position = 0
+        self.totals = dict.fromkeys(('total_clients', 'active_clients', 'clients_with_previous', 'clients_with_unpaid',
+                                     'total_sessions_current', 'total_previous_sessions', 'total_paid_used',
+                                     'total_remaining', 'total_unpaid'), 0)
+        self.session_buckets = [0] * len(SESSION_RANGES)
+        self.remaining_buckets = [0] * len(REMAINING_RANGES)
+        self.payment_patterns = {'only_paid': 0, 'only_unpaid': 0, 'mixed_payment': 0, 'no_sessions': 0}
+        self.days = {}      # date ordinal -> sessions
+        self.months = {}    # "YYYY-MM" -> sessions, in order of first appearance
+        self.weekdays = {}  # weekday name -> sessions, in order of first appearance
+        self._rankings = {}  # ranking -> cached top K (value, -position, client id); dropped when a change may reach it
+
+    @classmethod
+    def from_records(cls, records, top_k: int = TOP_K) -> 'AggregateState':
+        """A state for ``(client id, ClientRecord)`` pairs, in order (positions break ranking ties)."""
+        state = cls(top_k)
+        for client_id, record in records:
+            state.apply(client_id, record.session_ordinals(), (), {
+                'previousCompleted': {'to': record.previous_completed},
+                'currentPaidUsed': {'to': record.paid_used},
+                'currentRemaining': {'to': record.remaining},
+                'currentUnpaid': {'to': record.unpaid_count},
+            }, name=record.name)
+        return state
+
+    def apply(self, client_id: str, added_sessions, removed_sessions, stats_changes: Dict[str, Dict[str, Any]],
+              name: str = None, removed: bool = False):
+        """
+        Apply one client's change: session dates (ordinals) added and removed,
+        and ``stats_changes`` as ``{field: {'from', 'to'}}`` in the API's stats
+        naming (changefeed entries use the same layout). An unknown client is
+        added; ``removed`` drops the client after its sessions are removed.
+        """
+        old = self.clients.get(client_id)
+        if old is not None:
+            self._count_client(old, -1)
+        for ordinal in removed_sessions:
+            self._count_session(ordinal, -1)
+        for ordinal in added_sessions:
+            self._count_session(ordinal, 1)
+        if removed:
+            if old is not None:
+                del self.clients[client_id]
+            return
+
+        values = list(old) if old is not None else [name, 0, 0, 0, 0, self.next_position]
+        if old is None:
+            self.next_position += 1
+        if name is not None:
+            values[_NAME] = name
+        for field, change in stats_changes.items():
+            slot = _STATE_FIELDS.get(field)
+            if slot is not None and change.get('to') is not None:
+                values[slot] = change['to']
+        self.clients[client_id] = values
+        self._count_client(values, 1)
+
+    def apply_change(self, entry: Dict[str, Any]):
+        """Apply a changefeed client entry (see extract_sessions.client_delta)."""
+        added, removed = [], []
+        for kind in entry.get('sessions', {}).values():
+            added += (iso_date_ordinal(day) for day in kind.get('added', ()))
+            removed += (iso_date_ordinal(day) for day in kind.get('removed', ()))
+        self.apply(entry['id'], added, removed, entry.get('stats', {}), name=entry.get('name'),
+                   removed=entry.get('change') == 'removed')
+
+    def _count_client(self, values: List[Any], sign: int):
+        previous, paid, remaining, unpaid = values[_PREVIOUS], values[_PAID], values[_REMAINING], values[_UNPAID]
+        current = paid + remaining + unpaid
+        totals = self.totals
+        totals['total_clients'] += sign
+        totals['total_sessions_current'] += sign * current
+        totals['total_previous_sessions'] += sign * previous
+        totals['total_paid_used'] += sign * paid
+        totals['total_remaining'] += sign * remaining
+        totals['total_unpaid'] += sign * unpaid
+        totals['active_clients'] += sign * (current > 0)
+        totals['clients_with_previous'] += sign * (previous > 0)
+        totals['clients_with_unpaid'] += sign * (unpaid > 0)
+        pattern = _payment_pattern(current, paid, unpaid)
+        if pattern is not None:
+            self.payment_patterns[pattern] += sign
+        self.session_buckets[bisect_left(_SESSION_BOUNDS, current)] += sign
+        self.remaining_buckets[bisect_left(_REMAINING_BOUNDS, remaining)] += sign
+
+        # Called with the old values (sign -1) and the new ones (sign 1): either may enter or leave a top K
+        for ranking, top in list(self._rankings.items()):
+            value = _RANKING_VALUES[ranking](values)
+            if value is None:
+                continue
+            if len(top) < self.top_k or value >= top[-1][0] or any(entry[2] is values for entry in top):
+                del self._rankings[ranking]
+
+    def _count_session(self, ordinal: int, sign: int):
+        if not ordinal:
+            return  # A session whose date didn't resolve
+        session_date = date.fromordinal(ordinal)
+        for counts, key in ((self.days, ordinal), (self.months, session_date.strftime('%Y-%m')),
+                            (self.weekdays, calendar.day_name[session_date.weekday()])):
+            count = counts.get(key, 0) + sign
+            if count:
+                counts[key] = count
+            else:
+                del counts[key]
+
+    def _ranking(self, ranking: str) -> List[Tuple[str, int]]:
+        top = self._rankings.get(ranking)
+        if top is None:
+            value_of = _RANKING_VALUES[ranking]
+            entries = ((value_of(values), -values[_POSITION], values) for values in self.clients.values())
+            top = self._rankings[ranking] = nlargest(self.top_k, (entry for entry in entries if entry[0] is not None),
+                                                     key=lambda entry: entry[:2])
+        return [(values[_NAME], value) for value, _, values in top]
+
+    def aggregates(self) -> Dict[str, Any]:
+        """The dashboard figures, in aggregate_clients' layout."""
+        days = self.days
+        dates = {
+            'total_dated_sessions': sum(days.values()),
+            'first_session': date.fromordinal(min(days)) if days else None,
+            'last_session': date.fromordinal(max(days)) if days else None,
+            'monthly_counts': dict(self.months),
+            'daily_counts': dict(self.weekdays),
+            'busiest_month': max(self.months.items(), key=lambda item: item[1]) if self.months else (None, 0),
+            'busiest_day': max(self.weekdays.items(), key=lambda item: item[1]) if self.weekdays else (None, 0)
+        }
+        return {
+            'overview': _overview(self.totals),
+            'rankings': {ranking: self._ranking(ranking) for ranking in _RANKING_VALUES},
+            'patterns': _patterns(self.session_buckets, self.payment_patterns, self.remaining_buckets),
+            'dates': dates
+        }
+
+    def save(self, filename: str, stamp: str):
+        """Persist the state, stamped with the ``generatedAt`` of the JSON it now matches."""
+        self.stamp = stamp
+        state = {
+            'version': STATE_VERSION,
+            'stamp': stamp,
+            'topK': self.top_k,
+            'nextPosition': self.next_position,
+            'clients': self.clients,
+            'totals': self.totals,
+            'sessionBuckets': self.session_buckets,
+            'remainingBuckets': self.remaining_buckets,
+            'paymentPatterns': self.payment_patterns,
+            'days': self.days,
+            'months': self.months,
+            'weekdays': self.weekdays
+        }
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename: str):
+        """A state saved by ``save``, or None if it is missing, unreadable or from another version."""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('version') != STATE_VERSION:
+            return None
+        state = cls(saved['topK'])
+        state.stamp = saved['stamp']
+        state.next_position = saved['nextPosition']
+        state.clients = saved['clients']
+        state.totals = saved['totals']
+        state.session_buckets = saved['sessionBuckets']
+        state.remaining_buckets = saved['remainingBuckets']
+        state.payment_patterns = saved['paymentPatterns']
+        state.days = {int(ordinal): count for ordinal, count in saved['days'].items()}
+        state.months = saved['months']
+        state.weekdays = saved['weekdays']
+        return state
+
+def state_path(json_path: str) -> str:
+    """Where the aggregate state of a save_to_json output lives: fitness_sessions_api.json -> fitness_sessions_api.state.json."""
+    return os.path.splitext(json_path)[0] + ".state.json"
 
 def display_overview(stats: Dict[str, Any]):
     """Display overview statistics."""
+    from rich.table import Table
+    console = _console()
     table = Table(title="📊 Fitness Center Overview", show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan", width=25)
     table.add_column("Value", style="green", width=15)
@@ -258,6 +533,9 @@ def display_overview(stats: Dict[str, Any]):
 
 def display_rankings(rankings: Dict[str, List[Tuple[str, int]]]):
     """Display client rankings."""
+    from rich.columns import Columns
+    from rich.table import Table
+    console = _console()
     tables = []
     
     # Top all-time clients
@@ -297,6 +575,9 @@ def display_rankings(rankings: Dict[str, List[Tuple[str, int]]]):
 
 def display_date_analytics(date_stats: Dict[str, Any]):
     """Display date and time analytics."""
+    from rich.panel import Panel
+    from rich.table import Table
+    console = _console()
     if not date_stats['total_dated_sessions']:
         console.print("[yellow]No dated sessions found for analysis.[/yellow]")
         return
@@ -348,6 +629,9 @@ def display_date_analytics(date_stats: Dict[str, Any]):
 
 def display_patterns(patterns: Dict[str, Any]):
     """Display session patterns and distributions."""
+    from rich.columns import Columns
+    from rich.table import Table
+    console = _console()
     tables = []
     
     # Session count distribution
@@ -388,52 +672,150 @@ def display_patterns(patterns: Dict[str, Any]):
     
     console.print(table3)
 
+def rollup_path(json_path: str) -> str:
+    """Where the rollup of a save_to_json output lives: fitness_sessions_api.json -> fitness_sessions_api.rollup.json."""
+    return os.path.splitext(json_path)[0] + ".rollup.json"
+
+def workbook_hash(workbooks: List[str]) -> str:
+    """SHA-256 over the contents of the given workbooks, in order."""
+    digest = hashlib.sha256()
+    for path in workbooks:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def export_rollup(aggregates: Dict[str, Any], filename: str, workbooks: List[str], generated_at: str):
+    """
+    Write aggregate_clients' result as a rollup, stamped with the hash of the
+    workbooks it was extracted from and the ``generatedAt`` of the JSON it
+    describes, so load_rollup can tell whether it is still current.
+    """
+    rollup = {
+        'version': ROLLUP_VERSION,
+        'workbooks': workbooks,
+        'workbookHash': workbook_hash(workbooks),
+        'generatedAt': generated_at,
+        **aggregates
+    }
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        json.dump(rollup, f, ensure_ascii=False, default=str)  # Dates as YYYY-MM-DD
+    os.replace(tmp_filename, filename)
+
+def load_rollup(filename: str, generated_at: str):
+    """
+    The aggregates stored in a rollup, as aggregate_clients returns them, or
+    None when there is no usable rollup: missing or unreadable, written for
+    another JSON (``generated_at`` differs), or a workbook changed since.
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            rollup = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if rollup.get('version') != ROLLUP_VERSION or rollup.get('generatedAt') != generated_at:
+        return None
+    try:
+        if workbook_hash(rollup['workbooks']) != rollup['workbookHash']:
+            return None
+    except OSError:
+        return None
+    
+    # JSON has no dates or tuples: restore what the display functions get from a fresh computation
+    dates = rollup['dates']
+    for key in ('first_session', 'last_session'):
+        if dates[key] is not None:
+            dates[key] = date.fromisoformat(dates[key])
+    for key in ('busiest_month', 'busiest_day'):
+        dates[key] = tuple(dates[key])
+    rankings = {key: [tuple(entry) for entry in ranking] for key, ranking in rollup['rankings'].items()}
+    return {'overview': rollup['overview'], 'rankings': rankings, 'patterns': rollup['patterns'], 'dates': dates}
+
 def export_stats_summary(stats: Dict[str, Any], filename: str = "fitness_stats_summary.json"):
     """Export statistics summary to JSON file."""
+    console = _console()
     summary = {
         'generated_at': datetime.now().isoformat(),
         'overview': stats,
         'export_note': 'Detailed statistics exported from fitness_stats.py'
     }
     
-    with open(filename, 'w', encoding='utf-8') as f:
+    # Renamed into place so a reader never sees a half-written summary
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp_filename, filename)
     
     console.print(f"\n[green]📁 Statistics summary exported to {filename}[/green]")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analytics dashboard for the extracted fitness session data.")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase and record its tracemalloc peak, then print a report table")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="with --profile, also record the run with cProfile and dump the stats to PATH")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to run all analytics."""
+    from rich.progress import track
+    console = _console()
+    args = parse_args(argv)
+    if args.profile:
+        profiling.PROFILER.start(cprofile_path=args.profile_out)
+    
     console.print("\n[bold magenta]🏋️ Fitness Center Analytics Dashboard[/bold magenta]\n")
     
     # Load data
     console.print("[cyan]Loading fitness session data...[/cyan]")
-    data = load_fitness_data()
-    
-    console.print(f"[green]✅ Loaded data for {len(data['clients'])} clients[/green]\n")
-    
-    # Calculate all statistics
-    with console.status("[cyan]Calculating statistics..."):
-        overview_stats = get_overview_stats(data)
-        date_analytics = get_date_analytics(data)
-        client_rankings = get_client_rankings(data)
-        session_patterns = get_session_patterns(data)
+    with profiling.phase("load_fitness_data"):
+        data = load_fitness_data(stream=True)
+    
+    total_clients = data['metadata'].get('totalClients')
+    console.print(f"[green]✅ Loaded data for {total_clients if total_clients is not None else 'all'} clients[/green]\n")
+    
+    # The rollup written at extraction time has every figure when it is current
+    with profiling.phase("load_rollup"):
+        aggregates = load_rollup(rollup_path(DATA_FILE), data['metadata'].get('generatedAt'))
+    if aggregates is not None:
+        console.print("[green]⚡ Using the precomputed rollup (workbook unchanged since extraction)[/green]\n")
+    else:
+        # Calculate all statistics, decoding the clients as they are aggregated
+        with console.status("[cyan]Calculating statistics..."):
+            with profiling.phase("aggregate_clients"):
+                try:
+                    aggregates = aggregate_clients(track(data['clients'], total=total_clients, description="Analyzing clients..."))
+                except json.JSONDecodeError:
+                    console.print(f"[red]Error: Invalid JSON in {DATA_FILE}![/red]")
+                    sys.exit(1)
+    overview_stats = aggregates['overview']
+    client_rankings = aggregates['rankings']
+    session_patterns = aggregates['patterns']
+    date_analytics = aggregates['dates']
     
     # Display results
-    display_overview(overview_stats)
-    console.print("\n")
-    
-    display_rankings(client_rankings)
-    console.print("\n")
-    
-    display_date_analytics(date_analytics)
-    console.print("\n")
-    
-    display_patterns(session_patterns)
+    with profiling.phase("rendering"):
+        display_overview(overview_stats)
+        console.print("\n")
+        
+        display_rankings(client_rankings)
+        console.print("\n")
+        
+        display_date_analytics(date_analytics)
+        console.print("\n")
+        
+        display_patterns(session_patterns)
     
     # Export summary
-    export_stats_summary(overview_stats)
+    with profiling.phase("export_stats_summary"):
+        export_stats_summary(overview_stats)
     
     console.print("\n[bold green]📊 Analytics complete![/bold green]")
+    
+    if args.profile:
+        profiling.PROFILER.stop()
+        print(profiling.PROFILER.report("STATS PROFILE"))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,209 @@
+# /// script
+# dependencies = [
+#   "openpyxl",
+# ]
+# ///
+
+"""
+Synthetic trainer workbooks in the layout extract_client_sessions expects.
+
+Each client section looks like the real "Prezența GRUP" sheet:
+
+    row r       B: "Numele"               C: client name
+    row r+1     B: "Varsta si Greutatea"
+    row r+2     B: "Motivatia (de ce )"
+    rows r+3..  C: previous-sessions count (some clients, 3-7 rows below r)
+                D-M: blocks of three rows - a row of session cells (green =
+                paid, orange = unpaid) with the session dates in the row above
+                or the row below; undated green cells at the end are
+                pre-paid sessions still remaining
+
+Sessions are laid out in date order and the generator returns (and
+``--expected`` writes) the totals extraction must reproduce, so a benchmark
+can check it extracted what was generated. Output is deterministic for a
+given client count and seed.
+"""
+
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+
+# =============================================================================
+# CONFIGURATION CONSTANTS - Modify these to control the generated workbooks
+# =============================================================================
+
+MIN_CLIENTS = 100
+MAX_CLIENTS = 20000
+DEFAULT_SEED = 42
+SHEET_NAME = "Prezența GRUP"
+
+COLOR_PAID_GREEN = "FF00FF00"     # Same fills extract_sessions classifies
+COLOR_UNPAID_ORANGE = "FFFF9900"
+
+SESSION_COLUMNS = range(4, 14)    # D-M
+MAX_SESSIONS_PER_CLIENT = 150     # 15 blocks of three rows, well inside SEARCH_ROWS_PER_CLIENT
+HISTORY_DAYS = 330                # Dated sessions fall within this many days before the reference date
+SHARE_WITH_PREVIOUS = 0.25        # Clients with a previous-sessions count (30-400) in column C
+SHARE_WITH_UNPAID = 0.05          # Clients whose last sessions are unpaid (orange)
+SHARE_EXTRA_TEXT = 0.02           # Paid cells holding a note (extracted as "extra")
+SHARE_PRICE_TEXT = 0.05           # Paid cells holding a price (a number, not "extra")
+SPACER_ROWS = 2                   # Empty rows between client sections
+
+FIRST_NAMES = [
+    "Ana", "Andrei", "Alexandra", "Bogdan", "Carmen", "Cristian", "Daniela", "Dan", "Elena", "Florin",
+    "Gabriela", "George", "Ioana", "Ion", "Irina", "Laura", "Liviu", "Maria", "Mihai", "Monica",
+    "Nicoleta", "Ovidiu", "Paula", "Radu", "Raluca", "Sorin", "Simona", "Stefan", "Teodora", "Vlad",
+    "Adriana", "Catalin", "Diana", "Emil", "Iulia", "Lucian", "Mirela", "Petru", "Roxana", "Victor",
+]
+LAST_NAMES = [
+    "Popescu", "Ionescu", "Popa", "Pop", "Niculescu", "Stan", "Dumitru", "Dima", "Gheorghe", "Stoica",
+    "Matei", "Ciobanu", "Rusu", "Munteanu", "Florea", "Moldovan", "Barbu", "Nistor", "Tudor", "Lazar",
+    "Ilie", "Sandu", "Cristea", "Marin", "Oprea", "Constantin", "Mocanu", "Enache", "Neagu", "Toma",
+    "Muresan", "Bazarea", "Candea", "Gandila", "Soare", "Fulga", "Cotofan", "Trocan", "Harla", "Boboc",
+    "Lungu", "Avram", "Radulescu", "Voicu", "Preda", "Zamfir", "Vasile", "Serban", "Manole", "Ursu",
+]
+EXTRA_NOTES = ["abonament", "transfer", "cadou", "recuperare", "platit cash"]
+
+# =============================================================================
+# END CONFIGURATION
+# =============================================================================
+
+
+def client_names(count, rng):
+    """``count`` distinct, shuffled "First Last" names (a middle initial is added past the plain combinations)."""
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    initials = [chr(code) for code in range(ord("A"), ord("Z") + 1)]
+    index = 0
+    while len(names) < count:
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        initial = initials[(index // (len(FIRST_NAMES) * len(LAST_NAMES))) % len(initials)]
+        suffix = index // (len(FIRST_NAMES) * len(LAST_NAMES) * len(initials))
+        names.append(f"{first} {initial}. {last}" + (f" {suffix + 1}" if suffix else ""))
+        index += 1
+    rng.shuffle(names)
+    return names[:count]
+
+
+def plan_client(rng, reference_date):
+    """
+    One client's sessions: ``(dated, remaining, previous)`` where ``dated`` is
+    a date-ordered list of ``(date, kind, text)`` cells.
+    """
+    # Skewed like the real sheet: many light clients, a few very active ones
+    dated_count = min(int(rng.paretovariate(1.2) * 4) - 4, MAX_SESSIONS_PER_CLIENT - 10)
+    remaining = rng.choice([0, 0, 0, 1, 2, 3, 4, 5, 6, 8, 10])
+    previous = rng.randint(30, 400) if rng.random() < SHARE_WITH_PREVIOUS else 0
+
+    dated = []
+    if dated_count > 0:
+        span = min(HISTORY_DAYS, dated_count * rng.randint(2, 5))
+        day = reference_date - timedelta(days=rng.randint(span, HISTORY_DAYS))
+        step = max(1, span // dated_count)
+        unpaid_from = dated_count - rng.randint(1, 3) if rng.random() < SHARE_WITH_UNPAID else dated_count
+        for position in range(dated_count):
+            day += timedelta(days=rng.randint(1, step * 2 - 1) if step > 1 else 1)
+            if day > reference_date:
+                day = reference_date
+            kind = "unpaid" if position >= unpaid_from else "paid"
+            text = None
+            if kind == "paid":
+                roll = rng.random()
+                if roll < SHARE_EXTRA_TEXT:
+                    text = rng.choice(EXTRA_NOTES)
+                elif roll < SHARE_EXTRA_TEXT + SHARE_PRICE_TEXT:
+                    text = 30
+            dated.append((day, kind, text))
+    return dated, remaining, previous
+
+
+def generate_workbook(path, clients, seed=DEFAULT_SEED, reference_date=None):
+    """
+    Write a synthetic workbook with ``clients`` client sections to ``path``.
+
+    Returns the totals extraction should find: clients, paid (dated),
+    unpaid, remaining, previous sessions and extra notes, plus the row count.
+    """
+    if not MIN_CLIENTS <= clients <= MAX_CLIENTS:
+        raise ValueError(f"clients must be between {MIN_CLIENTS} and {MAX_CLIENTS}")
+    rng = random.Random(f"{seed}:{clients}")
+    reference_date = reference_date or date.today()
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(SHEET_NAME)
+    fills = {"paid": PatternFill("solid", fgColor=COLOR_PAID_GREEN),
+             "unpaid": PatternFill("solid", fgColor=COLOR_UNPAID_ORANGE)}
+
+    def colored(kind, value=None):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.fill = fills[kind]
+        return cell
+
+    def dated_cell(day):
+        cell = WriteOnlyCell(sheet, value=datetime(day.year, day.month, day.day))
+        cell.number_format = "dd.mm.yyyy"
+        return cell
+
+    totals = {"clients": clients, "paid": 0, "unpaid": 0, "remaining": 0, "previous": 0, "extra": 0, "rows": 0}
+    rows = [[], [], []]  # Three empty rows on top, like the real sheet
+    for name in client_names(clients, rng):
+        dated, remaining, previous = plan_client(rng, reference_date)
+        totals["paid"] += sum(1 for _, kind, _ in dated if kind == "paid")
+        totals["unpaid"] += sum(1 for _, kind, _ in dated if kind == "unpaid")
+        totals["extra"] += sum(1 for _, _, text in dated if isinstance(text, str))
+        totals["remaining"] += remaining if dated else 0  # Undated cells only count after a dated one
+        totals["previous"] += previous
+
+        section = [[None, "Numele", name], [None, "Varsta si Greutatea"], [None, "Motivatia (de ce )"]]
+        cells = [(day, kind, text) for day, kind, text in dated] + [(None, "paid", None)] * (remaining if dated else 0)
+        for start in range(0, len(cells), len(SESSION_COLUMNS)):
+            block = cells[start:start + len(SESSION_COLUMNS)]
+            dates_above = rng.random() < 0.5
+            date_row = [None] * 3 + [dated_cell(day) if day else None for day, _, _ in block]
+            cell_row = [None] * 3 + [colored(kind, text) for _, kind, text in block]
+            section += [date_row, cell_row, []] if dates_above else [[], cell_row, date_row]
+        if previous:
+            offset = rng.randint(3, 4)
+            while len(section) <= offset:
+                section.append([])
+            row = section[offset]
+            section[offset] = [None, None, previous] + list(row[3:]) if len(row) > 3 else [None, None, previous]
+        rows += section + [[] for _ in range(SPACER_ROWS)]
+
+    # A footer below the last section: extraction scans a client up to the row
+    # before the next one, and for the last client that is the sheet's last row
+    rows.append([f"Total clienti: {clients}"])
+    for row in rows:
+        sheet.append(row)
+    totals["rows"] = len(rows)
+    workbook.save(path)
+    return totals
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic trainer workbook for benchmarks and tests.")
+    parser.add_argument("clients", type=int, help=f"number of client sections ({MIN_CLIENTS}-{MAX_CLIENTS})")
+    parser.add_argument("-o", "--output", metavar="PATH", help="workbook to write (default: synthetic_<clients>.xlsx)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"random seed (default: {DEFAULT_SEED})")
+    parser.add_argument("--expected", metavar="PATH", help="also write the expected extraction totals as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or f"synthetic_{args.clients}.xlsx"
+    totals = generate_workbook(output, args.clients, args.seed)
+    if args.expected:
+        with open(args.expected, "w", encoding="utf-8") as f:
+            json.dump(totals, f, indent=2)
+    print(f"Wrote {output}: {totals['clients']} clients, {totals['rows']} rows, "
+          f"{totals['paid']} paid + {totals['unpaid']} unpaid dated sessions, {totals['remaining']} remaining")
+
+
+if __name__ == "__main__":
+    main()
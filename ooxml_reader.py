@@ -0,0 +1,303 @@
+"""
+Minimal streaming reader for .xlsx worksheets.
+
+The session extractor only needs three things per cell: its cached value,
+whether that value is a date, and its fill foreground color. This module reads
+exactly that straight from the workbook's zip parts - the sheet XML is streamed
+with ``iterparse`` and style indices are resolved through ``xl/styles.xml`` -
+without building openpyxl's object model.
+
+Value semantics follow openpyxl's ``data_only=True`` reader (numbers become int
+or float, date-formatted serials become datetime / time / timedelta, shared
+and inline strings are flattened, non-anchor cells of merged ranges are empty),
+so a grid built from this reader matches one built through openpyxl.
+"""
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, time, timedelta
+
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_C = f"{{{SHEET_NS}}}c"
+_ROW = f"{{{SHEET_NS}}}row"
+_V = f"{{{SHEET_NS}}}v"
+_T = f"{{{SHEET_NS}}}t"
+_R = f"{{{SHEET_NS}}}r"
+_IS = f"{{{SHEET_NS}}}is"
+_SI = f"{{{SHEET_NS}}}si"
+_MERGE_CELL = f"{{{SHEET_NS}}}mergeCell"
+
+WINDOWS_EPOCH = datetime(1899, 12, 30)
+MAC_EPOCH = datetime(1904, 1, 1)
+SECS_PER_DAY = 86400
+
+# Built-in number formats that are dates or times (ECMA-376 18.8.30)
+BUILTIN_DATE_FORMATS = {
+    14: "mm-dd-yy", 15: "d-mmm-yy", 16: "d-mmm", 17: "mmm-yy",
+    18: "h:mm AM/PM", 19: "h:mm:ss AM/PM", 20: "h:mm", 21: "h:mm:ss",
+    22: "m/d/yy h:mm", 45: "mm:ss", 46: "[h]:mm:ss", 47: "mmss.0",
+}
+
+# Quoted literals and bracketed sections other than elapsed-time markers don't count
+_FORMAT_STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_FORMAT_DATE_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_FORMAT_TIMEDELTA_RE = re.compile(r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.I)
+
+_COORDINATE_RE = re.compile(r"^\$?([A-Z]+)\$?(\d+)$")
+
+
+def is_date_format(code):
+    """True if a number format code renders dates or times (first section only)."""
+    if code is None:
+        return False
+    return _FORMAT_DATE_RE.search(_FORMAT_STRIP_RE.sub("", code.split(";")[0])) is not None
+
+
+def is_timedelta_format(code):
+    """True if a number format shows elapsed time ([h]:mm:ss and friends)."""
+    if code is None:
+        return False
+    return _FORMAT_TIMEDELTA_RE.search(code.split(";")[0]) is not None
+
+
+def from_excel_serial(value, epoch=WINDOWS_EPOCH, as_timedelta=False):
+    """Convert an Excel date serial to datetime (or time for pure fractions, timedelta for elapsed formats)."""
+    if as_timedelta:
+        td = timedelta(days=value)
+        if td.microseconds:
+            # Round to millisecond precision
+            td = timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * SECS_PER_DAY * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        minutes, seconds = divmod(diff.seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return time(hours, minutes, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        # Excel's fictitious 29-Feb-1900 shifts the first 60 serials by a day
+        day += 1
+    return epoch + timedelta(days=day) + diff
+
+
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - 64)
+    return index
+
+
+def _coordinate(ref):
+    match = _COORDINATE_RE.match(ref.upper())
+    return int(match.group(2)), column_index(match.group(1))
+
+
+def _cast_number(text):
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def _text_content(node):
+    """Plain text of a string item: its <t> plus every rich-text run's <t> (phonetic runs skipped)."""
+    snippets = []
+    plain = node.find(_T)
+    if plain is not None and plain.text:
+        snippets.append(plain.text)
+    for run in node.findall(_R):
+        text = run.find(_T)
+        if text is not None and text.text:
+            snippets.append(text.text)
+    return "".join(snippets)
+
+
+def _color_rgb(color):
+    """
+    Color key of a color element: its ARGB string, ``"theme:N[:tint]"`` or
+    ``"indexed:N"`` (the same keys extract_sessions builds from openpyxl), or
+    None for auto colors.
+    """
+    if color is None:
+        return "00000000"  # A pattern fill without fgColor has the default (empty) color
+    rgb = color.get("rgb")
+    if rgb is not None:
+        return rgb if len(rgb) == 8 else "00" + rgb
+    if color.get("theme") is not None:
+        tint = float(color.get("tint", 0))
+        return f"theme:{color.get('theme')}:{tint:g}" if tint else f"theme:{color.get('theme')}"
+    if color.get("indexed") is not None:
+        return f"indexed:{color.get('indexed')}"
+    return None
+
+
+class WorkbookReader:
+    """Workbook-level parts shared by every sheet: sheet list, styles, shared strings and date epoch."""
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self._read_workbook()
+        self._read_styles()
+        self._read_shared_strings()
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_workbook(self):
+        workbook = ET.fromstring(self.archive.read("xl/workbook.xml"))
+        rels = ET.fromstring(self.archive.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{{{PKG_REL_NS}}}Relationship")}
+
+        self.sheets = []  # (name, part path) in workbook order
+        for sheet in workbook.iter(f"{{{SHEET_NS}}}sheet"):
+            target = targets[sheet.get(f"{{{REL_NS}}}id")]
+            part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            self.sheets.append((sheet.get("name"), part))
+
+        view = workbook.find(f"{{{SHEET_NS}}}bookViews/{{{SHEET_NS}}}workbookView")
+        self.active_index = int(view.get("activeTab", 0)) if view is not None else 0
+
+        properties = workbook.find(f"{{{SHEET_NS}}}workbookPr")
+        date1904 = properties is not None and properties.get("date1904") in ("1", "true")
+        self.epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+    def _read_styles(self):
+        """Resolve every cell style index to (fill rgb, is date, is timedelta)."""
+        self.style_fill_rgb = ["00000000"]
+        self.date_styles = set()
+        self.timedelta_styles = set()
+        if "xl/styles.xml" not in self.archive.namelist():
+            return
+        styles = ET.fromstring(self.archive.read("xl/styles.xml"))
+
+        custom_formats = {
+            int(fmt.get("numFmtId")): fmt.get("formatCode")
+            for fmt in styles.iter(f"{{{SHEET_NS}}}numFmt")
+        }
+
+        fill_rgb = []
+        fills = styles.find(f"{{{SHEET_NS}}}fills")
+        for fill in (fills if fills is not None else []):
+            pattern = fill.find(f"{{{SHEET_NS}}}patternFill")
+            fill_rgb.append(_color_rgb(pattern.find(f"{{{SHEET_NS}}}fgColor")) if pattern is not None else None)
+
+        self.style_fill_rgb = []
+        cell_xfs = styles.find(f"{{{SHEET_NS}}}cellXfs")
+        for style_id, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            fill_id = int(xf.get("fillId", 0))
+            self.style_fill_rgb.append(fill_rgb[fill_id] if fill_id < len(fill_rgb) else "00000000")
+
+            num_fmt_id = int(xf.get("numFmtId", 0))
+            code = custom_formats.get(num_fmt_id, BUILTIN_DATE_FORMATS.get(num_fmt_id))
+            if is_date_format(code):
+                self.date_styles.add(style_id)
+                if is_timedelta_format(code):
+                    self.timedelta_styles.add(style_id)
+        if not self.style_fill_rgb:
+            self.style_fill_rgb = ["00000000"]
+
+    def _read_shared_strings(self):
+        self.shared_strings = []
+        if "xl/sharedStrings.xml" not in self.archive.namelist():
+            return
+        with self.archive.open("xl/sharedStrings.xml") as source:
+            for _, node in ET.iterparse(source):
+                if node.tag == _SI:
+                    self.shared_strings.append(_text_content(node).replace("x005F_", ""))
+                    node.clear()
+
+    def sheet(self, name=None):
+        """SheetReader for the named sheet (the active sheet by default)."""
+        if name is None:
+            name, part = self.sheets[self.active_index]
+        else:
+            part = dict(self.sheets)[name]
+        return SheetReader(self, part)
+
+
+class SheetReader:
+    """
+    Streams the cells of one worksheet part.
+
+    ``cells()`` yields ``(row, col, value, fill_rgb)`` for every ``<c>``
+    element. Once it is exhausted, ``max_row`` (highest row holding a cell or
+    a merged range, like openpyxl's ``ws.max_row``) and ``merged_ranges``
+    (``(min_row, min_col, max_row, max_col)`` tuples) are available.
+    """
+
+    def __init__(self, workbook, part):
+        self.workbook = workbook
+        self.part = part
+        self.max_row = 0
+        self.merged_ranges = []
+
+    def _value(self, cell, data_type, style_id):
+        if data_type == "inlineStr":
+            inline = cell.find(_IS)
+            return _text_content(inline) if inline is not None else None
+
+        v = cell.find(_V)
+        text = (v.text if v is not None else None) or None
+        if text is None:
+            return None
+        if data_type == "n":
+            value = _cast_number(text)
+            if style_id in self.workbook.date_styles:
+                try:
+                    return from_excel_serial(value, self.workbook.epoch, style_id in self.workbook.timedelta_styles)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return value
+        if data_type == "s":
+            return self.workbook.shared_strings[int(text)]
+        if data_type == "b":
+            return bool(int(text))
+        if data_type == "d":
+            return datetime.fromisoformat(text.replace("Z", ""))
+        return text  # "str" (formula result) and "e" (error) are kept as text
+
+    def cells(self, max_col=None):
+        fill_rgb = self.workbook.style_fill_rgb
+        row = 0
+        col = 0
+        with self.workbook.archive.open(self.part) as source:
+            for event, element in ET.iterparse(source, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag == _ROW:
+                        row = int(element.get("r", row + 1))
+                        col = 0
+                    continue
+
+                if tag == _C:
+                    ref = element.get("r")
+                    if ref:
+                        row, col = _coordinate(ref)
+                    else:
+                        col += 1
+                    if row > self.max_row:
+                        self.max_row = row
+                    if max_col is None or col <= max_col:
+                        style_id = int(element.get("s", 0))
+                        rgb = fill_rgb[style_id] if style_id < len(fill_rgb) else "00000000"
+                        yield row, col, self._value(element, element.get("t", "n"), style_id), rgb
+                elif tag == _ROW:
+                    element.clear()
+                elif tag == _MERGE_CELL:
+                    first, _, last = element.get("ref").partition(":")
+                    min_row, min_col = _coordinate(first)
+                    max_row, max_col_ = _coordinate(last or first)
+                    self.merged_ranges.append((min_row, min_col, max_row, max_col_))
+                    self.max_row = max(self.max_row, max_row)
@@ -0,0 +1,124 @@
+"""
+Per-phase profiling shared by extract_sessions.py and fitness_stats.py (``--profile``).
+
+Code marks its phases with ``profiling.phase(name)``; while the profiler is
+off that is a no-op context manager, so the markers cost nothing in normal
+runs. When started, each phase accumulates its call count, wall time and the
+tracemalloc peak reached while it was running (phases may nest; a parent's
+peak includes its children's). Optionally the whole run is also recorded
+with cProfile and dumped to a file for ``python -m pstats`` / snakeviz.
+
+Both scripts print the same report table via ``report()``.
+"""
+
+import cProfile
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+_DISABLED = nullcontext()
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.cprofile_path = None
+        self.phases = {}  # name -> {"calls", "seconds", "peak", "depth"} in first-seen order
+        self.seconds = 0.0
+        self._stack = []
+        self._cprofile = None
+        self._started = None
+
+    def start(self, trace_memory=True, cprofile_path=None):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        self.cprofile_path = cprofile_path
+        if trace_memory:
+            tracemalloc.start()
+        if cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started = perf_counter()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.seconds = perf_counter() - self._started
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self.trace_memory:
+            tracemalloc.stop()
+        self.enabled = False
+
+    def _stats(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = {"calls": 0, "seconds": 0.0, "peak": None, "depth": len(self._stack)}
+        return stats
+
+    def _fold_peak(self):
+        """Credit the tracemalloc peak since the last fold to every open phase, then reset it."""
+        peak = tracemalloc.get_traced_memory()[1]
+        for stats in self._stack:
+            stats["peak"] = max(stats["peak"] or 0, peak)
+        tracemalloc.reset_peak()
+
+    def phase(self, name):
+        """Context manager timing one occurrence of phase ``name``."""
+        if not self.enabled:
+            return _DISABLED
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        stats = self._stats(name)
+        if self.trace_memory:
+            self._fold_peak()
+        self._stack.append(stats)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - started
+            if self.trace_memory:
+                self._fold_peak()
+            self._stack.pop()
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+
+    def record(self, name, seconds):
+        """Add time measured elsewhere (e.g. in a worker process) to phase ``name``; no memory figure."""
+        if not self.enabled:
+            return
+        stats = self._stats(name)
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+
+    def report(self, title="PROFILE"):
+        """Concise text table: phase, calls, seconds, share of the run and peak traced memory."""
+        total = self.seconds or (perf_counter() - self._started if self._started else 0.0)
+        header = f"{'Phase':<30}{'Calls':>7}{'Time (s)':>11}{'% run':>8}{'Peak MB':>10}"
+        lines = [f"\n⏱️  {title} (total {total:.3f}s)", header, "-" * len(header)]
+        for name, stats in self.phases.items():
+            label = "  " * stats["depth"] + name
+            share = stats["seconds"] / total * 100 if total else 0.0
+            peak = f"{stats['peak'] / 1e6:.1f}" if stats["peak"] is not None else "-"
+            lines.append(f"{label:<30}{stats['calls']:>7}{stats['seconds']:>11.3f}{share:>7.1f}%{peak:>10}")
+        if self.cprofile_path:
+            lines.append(f"cProfile stats written to {self.cprofile_path} (python -m pstats {self.cprofile_path})")
+        return "\n".join(lines)
+
+
+# The process-wide profiler that --profile turns on
+PROFILER = Profiler()
+
+
+def phase(name):
+    return PROFILER.phase(name)
+
+
+def record(name, seconds):
+    PROFILER.record(name, seconds)
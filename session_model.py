@@ -0,0 +1,529 @@
+"""
+In-memory client model shared by extract_sessions.py and fitness_stats.py.
+
+A ClientRecord keeps a client's paid and unpaid sessions as ``array('i')``
+of date ordinals (``date.toordinal()``, 4 bytes per session) next to the
+session counts, so neither script passes dates around as strings. The JSON
+file (fitness_sessions_api.json) is one serialization of it: ``to_api()``
+writes a client object and ``from_api()`` reads one back, accepting both
+the ``{date, formatted}`` and the plain ISO session forms.
+
+The sessions store is a second, columnar serialization (see
+save_sessions_store / SessionsStore): fixed-width arrays that readers
+memory-map instead of parsing.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date, datetime
+
+_SESSION_DATE_STRINGS = {}
+
+
+def session_date_strings(ordinal):
+    """("YYYY-MM-DD", "DD.MM.YYYY") for a session date ordinal, formatted once per distinct date."""
+    strings = _SESSION_DATE_STRINGS.get(ordinal)
+    if strings is None:
+        day = date.fromordinal(ordinal)
+        strings = _SESSION_DATE_STRINGS[ordinal] = (day.isoformat(), day.strftime("%d.%m.%Y"))
+    return strings
+
+
+_ORDINALS_BY_ISO = {}
+
+
+def iso_date_ordinal(text):
+    """Ordinal of an ISO session date ("YYYY-MM-DD"), or 0 if it doesn't parse."""
+    ordinal = _ORDINALS_BY_ISO.get(text)
+    if ordinal is None:
+        try:
+            ordinal = datetime.fromisoformat(text).date().toordinal()
+        except (TypeError, ValueError):
+            ordinal = 0
+        _ORDINALS_BY_ISO[text] = ordinal
+    return ordinal
+
+
+def _session_ordinals(sessions):
+    ordinals = array("i")
+    for session in sessions or ():
+        ordinal = iso_date_ordinal(session if isinstance(session, str) else session.get("date"))
+        if ordinal:
+            ordinals.append(ordinal)
+    return ordinals
+
+
+class ClientRecord:
+    """
+    One client: name, session dates and counts.
+
+    ``paid`` / ``unpaid`` hold date ordinals in sheet order; 0 marks a
+    session whose date could not be resolved (counted, but not written to
+    JSON). ``paid_used`` and ``unpaid_count`` are the session counts, which
+    match the array lengths unless the record was read from JSON that
+    dropped such sessions. The remaining stats are derived.
+    """
+
+    __slots__ = ("name", "paid", "unpaid", "paid_used", "unpaid_count", "remaining",
+                 "previous_completed", "extra", "source", "id", "last_updated", "pending_dates")
+
+    def __init__(self, name, paid=(), unpaid=(), previous_completed=0, remaining=0,
+                 paid_used=None, unpaid_count=None, extra=None, source=None, id=None, last_updated=None):
+        self.name = name
+        self.paid = array("i", paid)
+        self.unpaid = array("i", unpaid)
+        self.paid_used = len(self.paid) if paid_used is None else paid_used
+        self.unpaid_count = len(self.unpaid) if unpaid_count is None else unpaid_count
+        self.remaining = remaining
+        self.previous_completed = previous_completed
+        self.extra = extra  # [{"date": "d.m", "text": ...}] from green cells, or None
+        self.source = source  # {"workbook", "sheet"} in batch output
+        self.id = id  # Only set when read from JSON
+        self.last_updated = last_updated
+        self.pending_dates = None  # Raw ("d.m" paid, "d.m" unpaid) lists until extract_sessions resolves the years
+
+    @property
+    def total_paid(self):
+        return self.paid_used + self.remaining
+
+    @property
+    def total_current(self):
+        return self.total_paid + self.unpaid_count
+
+    @property
+    def total_all_time(self):
+        return self.previous_completed + self.total_current
+
+    def session_ordinals(self):
+        """Every resolved session date (paid then unpaid) as ordinals."""
+        return [ordinal for ordinal in self.paid + self.unpaid if ordinal]
+
+    def stats(self):
+        """Stats in extract_sessions' snake_case layout (including the legacy aliases)."""
+        return {
+            "previous_completed": self.previous_completed,
+            "current_paid_used": self.paid_used,
+            "current_remaining": self.remaining,
+            "current_unpaid": self.unpaid_count,
+            "total_current": self.total_current,
+            "total_all_time": self.total_all_time,
+            # Legacy compatibility
+            "total": self.total_current,
+            "paid": self.total_paid,
+            "paid_used": self.paid_used,
+            "paid_remaining": self.remaining,
+            "unpaid": self.unpaid_count,
+        }
+
+    def api_stats(self):
+        return {
+            "previousCompleted": self.previous_completed,
+            "currentPaidUsed": self.paid_used,
+            "currentRemaining": self.remaining,
+            "currentUnpaid": self.unpaid_count,
+            "totalCurrent": self.total_current,
+            "totalAllTime": self.total_all_time,
+        }
+
+    @staticmethod
+    def _api_sessions(ordinals, iso_sessions):
+        sessions = []
+        for ordinal in ordinals:
+            if ordinal:
+                iso_date, formatted = session_date_strings(ordinal)
+                sessions.append(iso_date if iso_sessions else {"date": iso_date, "formatted": formatted})
+        return sessions
+
+    def to_api(self, client_id, last_updated, iso_sessions=False):
+        """Client object of fitness_sessions_api.json (sessions as plain ISO strings with ``iso_sessions``)."""
+        client_obj = {
+            "id": client_id,
+            "name": self.name,
+            "sessions": {
+                "paid": self._api_sessions(self.paid, iso_sessions),
+                "unpaid": self._api_sessions(self.unpaid, iso_sessions),
+            },
+            "stats": self.api_stats(),
+            "lastUpdated": last_updated,
+        }
+        if self.extra is not None:
+            client_obj["extra"] = self.extra
+        if self.source:
+            client_obj["source"] = self.source
+        return client_obj
+
+    @classmethod
+    def from_api(cls, client_obj):
+        """Read a fitness_sessions_api.json client object (either session form)."""
+        sessions = client_obj.get("sessions", {})
+        stats = client_obj.get("stats", {})
+        paid = _session_ordinals(sessions.get("paid"))
+        unpaid = _session_ordinals(sessions.get("unpaid"))
+        return cls(
+            client_obj.get("name"), paid, unpaid,
+            previous_completed=stats.get("previousCompleted", 0),
+            remaining=stats.get("currentRemaining", 0),
+            paid_used=stats.get("currentPaidUsed", len(paid)),
+            unpaid_count=stats.get("currentUnpaid", len(unpaid)),
+            extra=client_obj.get("extra"),
+            source=client_obj.get("source"),
+            id=client_obj.get("id"),
+            last_updated=client_obj.get("lastUpdated"),
+        )
+
+    def _key(self):
+        return (self.name, self.paid, self.unpaid, self.paid_used, self.unpaid_count, self.remaining,
+                self.previous_completed, self.extra, self.source)
+
+    def __eq__(self, other):
+        if not isinstance(other, ClientRecord):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __repr__(self):
+        return (f"ClientRecord({self.name!r}, paid={len(self.paid)}, unpaid={len(self.unpaid)}, "
+                f"remaining={self.remaining}, previous_completed={self.previous_completed})")
+
+
+# =============================================================================
+# Columnar sessions store
+# =============================================================================
+#
+# Layout (little-endian, every block padded to 8 bytes):
+#   header        magic, version, client count, session count, info length
+#   info          UTF-8 JSON: {"metadata": {...}, "clients": [{"id", "name", "lastUpdated", "extra"?, "source"?}]}
+#   per client    offsets (uint32, clients + 1), paid_ends (uint32),
+#                 previous_completed, paid_used, remaining, unpaid_count (int32)
+#   per session   client_index (uint32), ordinal (int32), paid flag (uint8)
+#
+# A client's sessions are ordinals[offsets[i]:offsets[i + 1]], paid ones first
+# (up to paid_ends[i]); only resolved dates are stored, as in the JSON.
+
+STORE_MAGIC = b"FLOSESS\0"
+STORE_VERSION = 1
+_STORE_HEADER = struct.Struct("<8sIIII")
+_CLIENT_COLUMNS = (("offsets", "I"), ("paid_ends", "I"), ("previous_completed", "i"),
+                   ("paid_used", "i"), ("remaining", "i"), ("unpaid_count", "i"))
+_SESSION_COLUMNS = (("client_index", "I"), ("ordinals", "i"), ("paid", "B"))
+
+
+def sessions_store_path(json_path):
+    """Sessions store written next to a JSON output: fitness_sessions_api.json -> fitness_sessions_api.sessions"""
+    return os.path.splitext(json_path)[0] + ".sessions"
+
+
+def _padding(size):
+    return b"\0" * (-size % 8)
+
+
+def save_sessions_store(path, clients, metadata):
+    """
+    Write ``clients`` - (client id, ClientRecord, lastUpdated) tuples - and the
+    JSON ``metadata`` as a columnar sessions store (atomically replaced).
+    """
+    info_clients = []
+    columns = {name: array(code) for name, code in _CLIENT_COLUMNS + _SESSION_COLUMNS}
+    columns["offsets"].append(0)
+    for index, (client_id, record, last_updated) in enumerate(clients):
+        info = {"id": client_id, "name": record.name, "lastUpdated": last_updated}
+        if record.extra is not None:
+            info["extra"] = record.extra
+        if record.source:
+            info["source"] = record.source
+        info_clients.append(info)
+
+        for flag, ordinals in ((1, record.paid), (0, record.unpaid)):
+            resolved = array("i", (ordinal for ordinal in ordinals if ordinal)) if 0 in ordinals else ordinals
+            columns["ordinals"].extend(resolved)
+            columns["client_index"].extend([index] * len(resolved))
+            columns["paid"].extend([flag] * len(resolved))
+            if flag:
+                columns["paid_ends"].append(len(columns["ordinals"]))
+        columns["offsets"].append(len(columns["ordinals"]))
+        columns["previous_completed"].append(record.previous_completed)
+        columns["paid_used"].append(record.paid_used)
+        columns["remaining"].append(record.remaining)
+        columns["unpaid_count"].append(record.unpaid_count)
+
+    info = json.dumps({"metadata": metadata, "clients": info_clients}, ensure_ascii=False).encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(info_clients), len(columns["ordinals"]), len(info)))
+        f.write(_padding(_STORE_HEADER.size))
+        f.write(info + _padding(len(info)))
+        for name, _ in _CLIENT_COLUMNS + _SESSION_COLUMNS:
+            column = columns[name]
+            if sys.byteorder != "little":
+                column.byteswap()
+            data = column.tobytes()
+            f.write(data + _padding(len(data)))
+    os.replace(tmp_path, path)
+
+
+class SessionsStore:
+    """
+    Read-only view of a sessions store. The file is memory-mapped and every
+    column is a zero-copy ``memoryview`` (``store.ordinals[i]``,
+    ``store.paid[i]``, ...), so opening costs one small JSON parse for the
+    names and ids regardless of how many sessions there are.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._map)
+        magic, version, client_count, session_count, info_length = _STORE_HEADER.unpack_from(buffer)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            raise ValueError(f"{path} is not a version {STORE_VERSION} sessions store")
+        if sys.byteorder != "little":
+            raise ValueError("sessions stores can only be memory-mapped on little-endian machines")
+
+        position = _STORE_HEADER.size + len(_padding(_STORE_HEADER.size))
+        info = json.loads(bytes(buffer[position:position + info_length]).decode("utf-8"))
+        position += info_length + len(_padding(info_length))
+        self.metadata = info["metadata"]
+        self.clients = info["clients"]
+        self.client_count = client_count
+        self.session_count = session_count
+
+        for name, code in _CLIENT_COLUMNS + _SESSION_COLUMNS:
+            length = client_count + 1 if name == "offsets" else (client_count if (name, code) in _CLIENT_COLUMNS else session_count)
+            size = length * struct.calcsize(code)
+            setattr(self, name, buffer[position:position + size].cast(code))
+            position += size + len(_padding(size))
+
+    def record(self, index):
+        """ClientRecord for client ``index`` (session arrays are copied out of the map)."""
+        info = self.clients[index]
+        start, paid_end, end = self.offsets[index], self.paid_ends[index], self.offsets[index + 1]
+        paid = array("i")
+        paid.frombytes(self.ordinals[start:paid_end].cast("B"))
+        unpaid = array("i")
+        unpaid.frombytes(self.ordinals[paid_end:end].cast("B"))
+        return ClientRecord(
+            info["name"], paid, unpaid,
+            previous_completed=self.previous_completed[index],
+            remaining=self.remaining[index],
+            paid_used=self.paid_used[index],
+            unpaid_count=self.unpaid_count[index],
+            extra=info.get("extra"),
+            source=info.get("source"),
+            id=info["id"],
+            last_updated=info.get("lastUpdated"),
+        )
+
+    def records(self):
+        return [self.record(index) for index in range(self.client_count)]
+
+
+def _fresh_store(json_path):
+    """
+    The SessionsStore next to ``json_path`` when it was written with that
+    JSON - same ``metadata.generatedAt`` - or the JSON is gone; else None.
+    Modification times are not compared: a copy or checkout can leave an old
+    store newer than the JSON it no longer matches.
+    """
+    store_path = sessions_store_path(json_path)
+    if not os.path.exists(store_path):
+        return None
+    try:
+        store = SessionsStore(store_path)
+    except (OSError, ValueError):
+        return None  # Unreadable or from another version: fall back to the JSON
+    if not os.path.exists(json_path):
+        return store
+    generated_at = store.metadata.get("generatedAt")
+    try:
+        if generated_at is not None and read_api_metadata(json_path).get("generatedAt") == generated_at:
+            return store
+    except ValueError:
+        pass  # Malformed JSON: let the caller's own read report it
+    return None
+
+
+def load_api_records(json_path):
+    """
+    ``(metadata, records, store)`` for a save_to_json output: its clients as
+    ClientRecords. The sessions store next to the JSON is memory-mapped
+    instead when it was written with the JSON (``store`` is then the
+    SessionsStore, otherwise None). Raises FileNotFoundError if neither
+    exists and ValueError for invalid JSON.
+    """
+    store = _fresh_store(json_path)
+    if store is not None:
+        return store.metadata, store.records(), store
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("metadata", {}), [ClientRecord.from_api(client) for client in data["clients"]], None
+
+
+# =============================================================================
+# Streaming JSON reader
+# =============================================================================
+#
+# Reads a save_to_json output without building the whole document: the
+# top-level object is walked member by member and the "clients" array element
+# by element, each decoded with json's raw_decode from a buffer refilled in
+# chunks. Only the current client (and an unconsumed chunk) is held at once.
+
+JSON_CHUNK_SIZE = 1 << 16
+# How much of the end of the file read_api_metadata looks at before walking the whole file
+METADATA_TAIL_SIZE = 1 << 16
+
+_JSON_DECODER = json.JSONDecoder()
+_METADATA_KEY = '"metadata"'
+
+
+class _JsonStream:
+    """Decodes JSON values one at a time from a text file."""
+
+    def __init__(self, f, chunk_size=JSON_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # Reads at least as much as is buffered, so a value larger than a chunk costs amortized linear time
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next non-whitespace character ("" at the end of the file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def skip(self, char):
+        """Consume ``char`` if it is next; returns whether it was."""
+        if self.peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number ending the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _walk_api_json(json_path, skip_clients=False, chunk_size=JSON_CHUNK_SIZE):
+    """
+    Yield ``(key, value)`` for the top-level members of a save_to_json output,
+    except "clients": each of its elements is yielded as ``(None, client)``
+    (decoded and dropped with ``skip_clients``).
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        if stream.skip("}"):
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "clients" and stream.skip("["):
+                if not stream.skip("]"):
+                    while True:
+                        client = stream.value()
+                        if not skip_clients:
+                            yield None, client
+                        if not stream.skip(","):
+                            break
+                    stream.expect("]")
+            else:
+                yield key, stream.value()
+            if not stream.skip(","):
+                stream.expect("}")
+                return
+
+
+def iter_api_clients(json_path, chunk_size=JSON_CHUNK_SIZE):
+    """Client objects of a save_to_json output, decoded one at a time."""
+    for key, client in _walk_api_json(json_path, chunk_size=chunk_size):
+        if key is None:
+            yield client
+
+
+def _tail_metadata(json_path):
+    """
+    The metadata when it is the document's last member (as save_to_json
+    writes it) and within METADATA_TAIL_SIZE of the end, else None.
+    """
+    with open(json_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - METADATA_TAIL_SIZE))
+        tail = f.read().decode("utf-8", errors="replace")
+    start = len(tail)
+    while True:
+        start = tail.rfind(_METADATA_KEY, 0, start)
+        if start < 0:
+            return None
+        colon = start + len(_METADATA_KEY)
+        rest = tail[colon:].lstrip()
+        if rest.startswith(":"):
+            try:
+                value, end = _JSON_DECODER.raw_decode(rest, len(rest) - len(rest[1:].lstrip()))
+            except json.JSONDecodeError:
+                continue
+            # Only the top-level object's closing brace may follow
+            if rest[end:].strip() == "}" and isinstance(value, dict):
+                return value
+
+
+def read_api_metadata(json_path):
+    """
+    The metadata of a save_to_json output without decoding its clients when
+    it sits at the end of the file; otherwise the document is walked once
+    (clients decoded and dropped, one at a time).
+    """
+    metadata = _tail_metadata(json_path)
+    if metadata is not None:
+        return metadata
+    metadata = {}
+    for key, value in _walk_api_json(json_path, skip_clients=True):
+        if key == "metadata":
+            metadata = value
+    return metadata
+
+
+def stream_api_records(json_path):
+    """
+    Like load_api_records, but ``records`` is an iterator yielding one
+    ClientRecord at a time: decoded from the JSON as it is read, or copied
+    out of the memory-mapped sessions store when that is fresh.
+    """
+    store = _fresh_store(json_path)
+    if store is not None:
+        return store.metadata, (store.record(index) for index in range(store.client_count)), store
+    metadata = read_api_metadata(json_path)
+    return metadata, (ClientRecord.from_api(client) for client in iter_api_clients(json_path)), None
@@ -0,0 +1,384 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
+
+"""
+Local HTTP server for the sessions API described in FITNESS_SESSIONS_API_DOCS.md.
+
+Serves the save_to_json output (fitness_sessions_api.json) without the
+frontend having to download the whole file:
+
+    GET /api/clients            paginated, filterable client list
+    GET /api/clients/:id        one client
+    GET /api/dashboard/stats    dashboard totals (fitness_stats.get_overview_stats)
+
+The file is loaded once into a ``Dataset``: every client is pre-encoded,
+indexed by id and pre-sorted, and the dashboard stats are computed up front,
+so a request only filters indexes and joins bytes. Responses carry an ETag
+(answering ``If-None-Match`` with 304) and are gzip-compressed when the client
+accepts it. The file is polled and a changed one is loaded in the background
+and swapped in; requests in flight keep the dataset they started with.
+
+Besides the standard library only numpy (through fitness_stats) is needed,
+orjson is used when installed, and the server binds to localhost by default.
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fitness_stats import get_overview_stats
+from session_model import ClientRecord
+
+try:
+    import orjson  # Optional: faster JSON encoding and decoding
+except ImportError:
+    orjson = None
+
+# =============================================================================
+# CONFIGURATION CONSTANTS - Modify these to control server behavior
+# =============================================================================
+
+DATA_FILE = "fitness_sessions_api.json"
+HOST = "127.0.0.1"            # Local only; use --host 0.0.0.0 to expose it on the network
+PORT = 8000
+DEFAULT_PAGE_LIMIT = 50       # Clients per page when ?limit= is not given
+MAX_PAGE_LIMIT = 500
+MAX_PAGE = 1_000_000           # Larger ?page= values are rejected with 400
+RELOAD_INTERVAL = 1.0         # Seconds between checks of DATA_FILE for changes
+GZIP_MIN_BYTES = 1024         # Smaller responses are sent uncompressed
+GZIP_LEVEL = 6
+RESPONSE_CACHE_SIZE = 256     # Encoded responses kept per dataset
+MAX_HEADER_BYTES = 16384
+
+# ?sort= values for /api/clients; the default keeps the file's order
+CLIENT_SORTS = {
+    "name": lambda client: client.name.lower(),
+    "activity": lambda client: -client.total_all_time,   # Sort Clients by Activity (most sessions first)
+    "current": lambda client: -client.total_current,
+    "unpaid": lambda client: -client.unpaid_count,
+    "remaining": lambda client: -client.remaining,
+}
+
+logger = logging.getLogger("sessions_server")
+
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class BadRequest(ValueError):
+    """A query parameter the API can't satisfy (answered with 400)."""
+
+
+def _flag(params, name):
+    value = params.get(name)
+    if value is None:
+        return False
+    if value.lower() in ("1", "true", "yes", ""):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise BadRequest(f"{name} must be true or false")
+
+
+def _int(params, name, default, minimum=0, maximum=None):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        raise BadRequest(f"{name} must be between {minimum} and {maximum}" if maximum is not None else f"{name} must be at least {minimum}")
+    return number
+
+
+class Dataset:
+    """
+    One loaded fitness_sessions_api.json: pre-encoded clients, an id index,
+    pre-sorted orders and the dashboard stats. Immutable once built, so the
+    server swaps whole datasets instead of updating one in place.
+    """
+
+    def __init__(self, raw, path=DATA_FILE, stat=None):
+        data = _loads(raw)
+        self.path = path
+        self.stat = stat
+        # Content hash: a rewritten but unchanged file keeps every ETag valid
+        self.version = hashlib.sha1(raw).hexdigest()[:16]
+        self.metadata = data.get("metadata", {})
+        self.loaded_at = datetime.now().isoformat()
+
+        clients = data["clients"]
+        self.encoded = [_dumps(client) for client in clients]
+        self.records = [ClientRecord.from_api(client) for client in clients]
+        # Names can share an id ("Ana-Maria Pop" / "Ana Maria Pop"): repeats are
+        # reachable as "<id>#2", "<id>#3", ... as in extract_sessions._records_by_id
+        self.by_id = {}
+        for index, client in enumerate(clients):
+            client_id = base_id = client["id"]
+            suffix = 1
+            while client_id in self.by_id:
+                suffix += 1
+                client_id = f"{base_id}#{suffix}"
+            self.by_id[client_id] = index
+        self.names = [record.name.lower() for record in self.records]
+        self.orders = {
+            sort: sorted(range(len(self.records)), key=lambda index: key(self.records[index]))
+            for sort, key in CLIENT_SORTS.items()
+        }
+
+        overview = get_overview_stats({"clients": self.records})
+        price = overview["avg_session_price"]
+        # The documented dashboard fields, then fitness_stats' full overview
+        self.dashboard = _dumps({
+            "totalClients": self.metadata.get("totalClients", len(clients)),
+            "totalRevenue": overview["total_paid_used"] * price,
+            "outstandingPayments": overview["total_unpaid"] * price,
+            "remainingSessions": overview["total_remaining"],
+            "activeClients": overview["active_clients"],
+            "overview": overview,
+            "generatedAt": self.metadata.get("generatedAt"),
+        })
+        self._responses = OrderedDict()
+
+    @classmethod
+    def load(cls, path=DATA_FILE):
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        return cls(raw, path, (stat.st_mtime_ns, stat.st_size))
+
+    def client_page(self, params):
+        """Body of GET /api/clients (the documented pagination shape plus the applied filters)."""
+        query = params.get("q", "").strip().lower()
+        has_unpaid = _flag(params, "hasUnpaid")
+        has_remaining = _flag(params, "hasRemaining")
+        min_sessions = _int(params, "minSessions", 0)
+        page = _int(params, "page", 1, minimum=1, maximum=MAX_PAGE)
+        limit = _int(params, "limit", DEFAULT_PAGE_LIMIT, minimum=1, maximum=MAX_PAGE_LIMIT)
+        sort = params.get("sort")
+        if sort is not None and sort not in self.orders:
+            raise BadRequest(f"sort must be one of: {', '.join(self.orders)}")
+
+        indexes = self.orders[sort] if sort else range(len(self.records))
+        if query or has_unpaid or has_remaining or min_sessions:
+            records, names = self.records, self.names
+            indexes = [
+                index for index in indexes
+                if (not query or query in names[index])
+                and (not has_unpaid or records[index].unpaid_count > 0)
+                and (not has_remaining or records[index].remaining > 0)
+                and records[index].total_all_time >= min_sessions
+            ]
+        total = len(indexes)
+        start = (page - 1) * limit
+        clients = b",".join(self.encoded[index] for index in indexes[start:start + limit])
+        tail = _dumps({"total": total, "page": page, "limit": limit, "totalPages": -(-total // limit)})
+        return b'{"clients":[' + clients + b"]," + tail[1:]
+
+    def client(self, client_id):
+        index = self.by_id.get(client_id)
+        return self.encoded[index] if index is not None else None
+
+    def response(self, key, build):
+        """Encoded body for a normalized request ``key``, built at most once per dataset (LRU)."""
+        body = self._responses.get(key)
+        if body is None:
+            body = build()
+            self._responses[key] = body
+            if len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        else:
+            self._responses.move_to_end(key)
+        return body
+
+
+class SessionsServer:
+    def __init__(self, path=DATA_FILE, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.dataset = Dataset.load(path)
+        logger.info("Loaded %d clients from %s (version %s)", len(self.dataset.records), path, self.dataset.version)
+
+    # -- dataset hot-swap ---------------------------------------------------
+
+    async def watch(self):
+        """Poll the data file and swap in a freshly loaded Dataset when it changes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == self.dataset.stat:
+                continue
+            try:
+                dataset = await loop.run_in_executor(None, Dataset.load, self.path)
+            except (OSError, ValueError, KeyError) as e:
+                # Most likely caught mid-write; the next poll tries again
+                logger.warning("Keeping version %s, could not load %s: %s", self.dataset.version, self.path, e)
+                continue
+            if dataset.version != self.dataset.version:
+                logger.info("Reloaded %d clients from %s (version %s)", len(dataset.records), self.path, dataset.version)
+            self.dataset = dataset
+
+    # -- routing --------------------------------------------------------------
+
+    def route(self, path, params):
+        """Return (dataset, status, body bytes) for a GET of ``path``; list bodies are cached per dataset."""
+        dataset = self.dataset  # One dataset for the whole request, even if a reload lands meanwhile
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["api", "clients"]:
+            key = ("clients",) + tuple(sorted(params.items()))
+            return dataset, HTTPStatus.OK, dataset.response(key, lambda: dataset.client_page(params))
+        if len(parts) == 3 and parts[:2] == ["api", "clients"]:
+            body = dataset.client(parts[2])
+            if body is None:
+                return dataset, HTTPStatus.NOT_FOUND, _dumps({"error": f"Client {parts[2]!r} not found"})
+            return dataset, HTTPStatus.OK, body
+        if parts == ["api", "dashboard", "stats"]:
+            return dataset, HTTPStatus.OK, dataset.dashboard
+        return dataset, HTTPStatus.NOT_FOUND, _dumps({"error": f"No route for {path}"})
+
+    # -- HTTP -----------------------------------------------------------------
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, b"", {}, close=True)
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, b"", {}, close=True)
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+
+                await self._respond(writer, method, target, headers, close)
+                if close:
+                    return
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, method, target, headers, close):
+        if method not in ("GET", "HEAD"):
+            await self._send(writer, HTTPStatus.METHOD_NOT_ALLOWED, _dumps({"error": "Only GET and HEAD are supported"}),
+                             {"Allow": "GET, HEAD"}, close=close)
+            return
+
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        try:
+            dataset, status, body = self.route(url.path, params)
+        except BadRequest as e:
+            status, body, etag = HTTPStatus.BAD_REQUEST, _dumps({"error": str(e)}), None
+        except Exception:
+            # Answer instead of dropping the connection; the traceback goes to the log
+            logger.exception("%s %s failed", method, target)
+            status, body, etag = HTTPStatus.INTERNAL_SERVER_ERROR, _dumps({"error": "Internal server error"}), None
+        else:
+            # Responses are a pure function of (dataset, path, query)
+            request_hash = hashlib.sha1(target.encode("utf-8")).hexdigest()[:8]
+            etag = f'"{dataset.version}-{request_hash}"' if status == HTTPStatus.OK else None
+
+        extra = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag is not None:
+            use_gzip = len(body) >= GZIP_MIN_BYTES and "gzip" in headers.get("accept-encoding", "")
+            if use_gzip:
+                etag = etag[:-1] + '-gzip"'
+            extra["ETag"] = etag
+            if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+                await self._send(writer, HTTPStatus.NOT_MODIFIED, b"", extra, close=close, head=True)
+                logger.info("%s %s 304", method, target)
+                return
+            if use_gzip:
+                body = dataset.response(("gzip", target), lambda: gzip.compress(body, GZIP_LEVEL))
+                extra["Content-Encoding"] = "gzip"
+
+        await self._send(writer, status, body, extra, close=close, head=method == "HEAD")
+        logger.info("%s %s %d (%d bytes)", method, target, status, len(body))
+
+    async def _send(self, writer, status, body, extra_headers, close=False, head=False):
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Date: {formatdate(usegmt=True)}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'close' if close else 'keep-alive'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in extra_headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving {self.path} ({len(self.dataset.records)} clients) on http://{host}:{port}/api/clients")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve fitness_sessions_api.json as the documented REST API.")
+    parser.add_argument("--data", default=DATA_FILE, metavar="PATH",
+                        help=f"save_to_json output to serve and watch for changes (default: {DATA_FILE})")
+    parser.add_argument("--host", default=HOST, help=f"address to bind (default: {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"port to listen on (default: {PORT})")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL, metavar="SECONDS",
+                        help=f"how often to check the data file for changes (default: {RELOAD_INTERVAL})")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log every request and dataset reload")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s %(message)s")
+    server = SessionsServer(args.data, reload_interval=args.reload_interval)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()